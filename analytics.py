@@ -0,0 +1,393 @@
+import argparse
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from html import escape
+
+import job_store
+import metrics
+import render
+
+# Employer, category and keyword statistics served from rollup tables in the job
+# store. The rollups hold ad counts per day, source, employer and category (and per
+# day, source and title keyword); `refresh` folds in only the ads first stored by
+# runs not folded yet, so keeping them current costs as much as the new ads of a
+# run, and every query sums a table that grows with the number of distinct days and
+# employers rather than with the number of ads. An ad is counted once, on its
+# publication date (first-seen date when it has none), with the employer and
+# category it was stored with; later edits and removals do not change the counts.
+# After changing KEYWORDS or the classifier, `--rebuild` recounts from the jobs table.
+
+# --- Configuration ---
+STATS_FILE = "public/stats.html"
+STALE_RUN_HOURS = 6  # Runs unfinished for this long (e.g. a crashed crawl) are folded anyway
+LEGACY_RUN = 0  # Stands for the ads stored before runs were recorded (first_run IS NULL)
+UNKNOWN_EMPLOYER = "Unknown Employer"
+UNCATEGORIZED = "Uncategorized"
+CONSULTANCY = "Consultancy"
+TOP_EMPLOYERS = 25
+SUMMARY_MONTHS = 12  # History shown on the summary page
+SUMMARY_WEEKS = 12
+KEYWORD_MONTHS = 6
+
+# Title keywords counted per day; case-insensitive, matched as whole words
+KEYWORDS = (
+    "python", "java", "c++", "c#", ".net", "javascript", "typescript", "react", "embedded", "autosar",
+    "cloud", "devops", "kubernetes", "ai", "ml", "data", "android", "fullstack", "backend", "frontend",
+    "test", "junior", "senior",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    employer TEXT NOT NULL,
+    category TEXT NOT NULL,
+    ads INTEGER NOT NULL,
+    PRIMARY KEY (day, source, employer, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_keywords (
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    ads INTEGER NOT NULL,
+    PRIMARY KEY (day, source, keyword)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_runs (
+    run_id INTEGER PRIMARY KEY,
+    folded_at TEXT NOT NULL,
+    ads INTEGER NOT NULL
+);
+"""
+
+# Day an ad is counted on: its publication date, or the day it was first stored
+DAY = ("CASE WHEN date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' THEN substr(date, 1, 10) "
+       "ELSE substr(first_seen, 1, 10) END")
+
+# Period name -> SQL expression over rollup days
+PERIODS = {
+    "day": "day",
+    "week": "strftime('%Y-%W', day)",  # As job_store.new_ads_per_week
+    "month": "substr(day, 1, 7)",
+    "year": "substr(day, 1, 4)",
+}
+DIMENSIONS = ("source", "employer", "category")
+
+KEYWORD_PATTERNS = {
+    keyword: re.compile(rf"(?<![\w+#.]){re.escape(keyword)}(?![\w+#])", re.IGNORECASE) for keyword in KEYWORDS
+}
+
+
+# --- Rollups ---
+def connect(path=job_store.DB_FILE):
+    """
+    Open the job store with the rollup tables created.
+    """
+    conn = job_store.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def pending_runs(conn):
+    """
+    Return the ids of the runs whose new ads are not folded into the rollups yet:
+    finished (or stale) runs, and LEGACY_RUN until it has been folded once.
+    """
+    stale = (datetime.now() - timedelta(hours=STALE_RUN_HOURS)).isoformat(timespec="seconds")
+    runs = [row[0] for row in conn.execute(
+        "SELECT run_id FROM runs WHERE (finished_at IS NOT NULL OR started_at < ?) "
+        "AND run_id NOT IN (SELECT run_id FROM rollup_runs) ORDER BY run_id",
+        (stale,),
+    )]
+    if not conn.execute("SELECT 1 FROM rollup_runs WHERE run_id = ?", (LEGACY_RUN,)).fetchone():
+        runs.insert(0, LEGACY_RUN)
+    return runs
+
+
+def title_keywords(title):
+    return [keyword for keyword, pattern in KEYWORD_PATTERNS.items() if pattern.search(title)]
+
+
+def _fold_run(conn, run_id):
+    """
+    Add the ads first stored by one run to the rollups. Returns the number of ads.
+    """
+    where, params = ("first_run IS NULL", ()) if run_id == LEGACY_RUN else ("first_run = ?", (run_id,))
+    conn.execute(
+        "INSERT INTO rollup_daily (day, source, employer, category, ads) "
+        f"SELECT {DAY}, source, COALESCE(NULLIF(employer, ''), ?), COALESCE(NULLIF(category, ''), ?), COUNT(*) "
+        f"FROM jobs WHERE {where} GROUP BY 1, 2, 3, 4 "
+        "ON CONFLICT (day, source, employer, category) DO UPDATE SET ads = ads + excluded.ads",
+        (UNKNOWN_EMPLOYER, UNCATEGORIZED, *params),
+    )
+    ads = 0
+    keywords = Counter()
+    for day, source, title in conn.execute(f"SELECT {DAY}, source, title FROM jobs WHERE {where}", params):
+        ads += 1
+        for keyword in title_keywords(title or ""):
+            keywords[day, source, keyword] += 1
+    conn.executemany(
+        "INSERT INTO rollup_keywords (day, source, keyword, ads) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (day, source, keyword) DO UPDATE SET ads = ads + excluded.ads",
+        ((*key, count) for key, count in keywords.items()),
+    )
+    conn.execute(
+        "INSERT INTO rollup_runs (run_id, folded_at, ads) VALUES (?, ?, ?)",
+        (run_id, datetime.now().isoformat(timespec="seconds"), ads),
+    )
+    return ads
+
+
+def refresh(conn, rebuild=False):
+    """
+    Fold the ads of every pending run into the rollups, in one write transaction,
+    so concurrent refreshes cannot fold a run twice. With `rebuild` the rollups are
+    emptied first and recounted from the whole jobs table. Returns (runs, ads) folded.
+    """
+    conn.executescript(SCHEMA)
+    with metrics.timer("rollup_seconds"):
+        conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading the pending runs
+        try:
+            if rebuild:
+                for table in ("rollup_daily", "rollup_keywords", "rollup_runs"):
+                    conn.execute(f"DELETE FROM {table}")
+            runs = pending_runs(conn)
+            ads = sum(_fold_run(conn, run_id) for run_id in runs)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    metrics.inc("rollup_runs_total", len(runs))
+    metrics.inc("rollup_ads_total", ads)
+    if runs:
+        print(f"[{datetime.now()}] Folded {ads} new ads of {len(runs)} runs into the rollups.")
+    return len(runs), ads
+
+
+# --- Queries ---
+def _where(since=None, until=None, **equal):
+    """
+    WHERE clause and parameters over rollup days (since inclusive, until exclusive)
+    and the given column values (None matches all).
+    """
+    conditions, params = [], []
+    if since:
+        conditions.append("day >= ?")
+        params.append(since)
+    if until:
+        conditions.append("day < ?")
+        params.append(until)
+    for column, value in equal.items():
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def ads_by(conn, by=(), period=None, since=None, until=None, source=None, employer=None, category=None,
+           limit=None):
+    """
+    Return (period, *by, ads) rows of ad counts grouped by `period` (a key of PERIODS,
+    or None for the whole range) and the DIMENSIONS in `by`, filtered by day range
+    and dimension values. Rows are ordered by period, then by most ads; `limit`
+    applies to the whole result.
+    """
+    unknown = set(by) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions {sorted(unknown)}, expected some of {DIMENSIONS}")
+    if period is not None and period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}, expected one of {list(PERIODS)}")
+    columns = [PERIODS[period] if period else "NULL", *by]
+    where, params = _where(since, until, source=source, employer=employer, category=category)
+    group = f"GROUP BY {', '.join(str(index) for index in range(1, len(columns) + 1))}" \
+        if period or by else ""
+    order = "ORDER BY 1, ads DESC" + "".join(f", {column}" for column in by)
+    rows = conn.execute(
+        f"SELECT {', '.join(columns)}, SUM(ads) AS ads FROM rollup_daily {where} {group} {order}"
+        + (" LIMIT ?" if limit else ""),
+        params + ([limit] if limit else []),
+    )
+    return rows.fetchall()
+
+
+def total_ads(conn, since=None, until=None, source=None):
+    return ads_by(conn, since=since, until=until, source=source)[0][-1] or 0
+
+
+def ads_per_employer(conn, period="week", since=None, source=None):
+    """
+    Return (period, employer, ads) rows, e.g. ads per employer per week.
+    """
+    return ads_by(conn, ("employer",), period, since=since, source=source)
+
+
+def top_employers(conn, since=None, until=None, category=None, source=None, limit=TOP_EMPLOYERS):
+    """
+    Return (employer, ads) of the employers with the most ads, most first.
+    """
+    rows = ads_by(conn, ("employer",), since=since, until=until, source=source, category=category, limit=limit)
+    return [(employer, ads) for _, employer, ads in rows]
+
+
+def category_shares(conn, period="month", since=None, source=None):
+    """
+    Return (period, {category: ads}, total) per period, oldest first.
+    """
+    shares = {}
+    for key, category, ads in ads_by(conn, ("category",), period, since=since, source=source):
+        shares.setdefault(key, {})[category] = ads
+    return [(key, counts, sum(counts.values())) for key, counts in shares.items()]
+
+
+def consultancy_share(conn, period="month", since=None, source=None):
+    """
+    Return (period, consultancy ads, total ads, share) per period, oldest first.
+    """
+    return [(key, counts.get(CONSULTANCY, 0), total, counts.get(CONSULTANCY, 0) / total)
+            for key, counts, total in category_shares(conn, period, since, source)]
+
+
+def keyword_trends(conn, period="month", since=None, source=None, keywords=None):
+    """
+    Return (period, keyword, ads) rows of title keyword counts, ordered by period,
+    then by most ads.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}, expected one of {list(PERIODS)}")
+    where, params = _where(since, source=source)
+    if keywords:
+        where += f"{' AND' if where else 'WHERE'} keyword IN ({', '.join('?' * len(keywords))})"
+        params.extend(keywords)
+    return conn.execute(
+        f"SELECT {PERIODS[period]}, keyword, SUM(ads) AS ads FROM rollup_keywords {where} "
+        "GROUP BY 1, 2 ORDER BY 1, ads DESC, keyword",
+        params,
+    ).fetchall()
+
+
+# --- Summary page ---
+def _table(heading, header, records):
+    columns = list(header)
+    return render.GROUP_TEMPLATE.substitute(
+        heading=f"<h2>{escape(heading)}</h2>",
+        header="".join(f"<th>{escape(column)}</th>" for column in columns),
+        rows=render.render_rows(records, columns),
+    )
+
+
+def months_back(today, months):
+    """
+    First day (YYYY-MM-DD) of the month `months - 1` months before that of `today`.
+    """
+    month = today.year * 12 + today.month - months
+    return date(month // 12, month % 12 + 1, 1).isoformat()
+
+
+def summary_html(conn, today=None):
+    """
+    Render the statistics page from the rollups.
+    """
+    today = today or date.today()
+    since_month = months_back(today, SUMMARY_MONTHS)
+    sections = []
+
+    per_source = {}
+    for month, source, ads in ads_by(conn, ("source",), "month", since=since_month):
+        per_source.setdefault(month, {})[source] = ads
+    sources = sorted({source for counts in per_source.values() for source in counts})
+    shares = {month: (consultancy, share) for month, consultancy, _, share
+              in consultancy_share(conn, "month", since=since_month)}
+    sections.append(_table(
+        "Ads per month",
+        ["Month", *sources, "Total", "Consultancy", "Consultancy share"],
+        [{"Month": month, **counts, "Total": sum(counts.values()), "Consultancy": shares[month][0],
+          "Consultancy share": f"{shares[month][1]:.0%}"}
+         for month, counts in reversed(per_source.items())],
+    ))
+
+    since_week = (today - timedelta(weeks=SUMMARY_WEEKS)).isoformat()
+    weeks = {}
+    for week, category, ads in ads_by(conn, ("category",), "week", since=since_week):
+        weeks.setdefault(week, {})[category] = ads
+    categories = sorted({category for counts in weeks.values() for category in counts})
+    sections.append(_table(
+        f"Ads per week, last {SUMMARY_WEEKS} weeks",
+        ["Week", *categories, "Total"],
+        [{"Week": week, **counts, "Total": sum(counts.values())} for week, counts in reversed(weeks.items())],
+    ))
+
+    since_quarter = (today - timedelta(days=90)).isoformat()
+    sections.append(_table(
+        "Top employers, last 90 days",
+        ["Employer", "Ads"],
+        [{"Employer": employer, "Ads": ads} for employer, ads in top_employers(conn, since=since_quarter)],
+    ))
+
+    since_keywords = months_back(today, KEYWORD_MONTHS)
+    trends = {}
+    months = []
+    for month, keyword, ads in keyword_trends(conn, "month", since=since_keywords):
+        if month not in months:
+            months.append(month)
+        trends.setdefault(keyword, {})[month] = ads
+    ranked = sorted(trends.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+    sections.append(_table(
+        f"Title keywords per month, last {KEYWORD_MONTHS} months",
+        ["Keyword", *months],
+        [{"Keyword": keyword, **counts} for keyword, counts in ranked],
+    ))
+
+    return render.PAGE_TEMPLATE.substitute(
+        title="Job Statistics", heading="Job Statistics", search="", nav="",
+        body="".join(sections),
+    )
+
+
+def write_summary(conn, filename=STATS_FILE, today=None):
+    """
+    Write the statistics page, unless it is unchanged. Returns True if it was written.
+    """
+    with metrics.timer("stats_render_seconds"):
+        written = render.write_if_changed(filename, summary_html(conn, today))
+    print(f"[{datetime.now()}] Statistics page {filename} {'written' if written else 'unchanged'}.")
+    return written
+
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update and query the employer and category rollups.")
+    parser.add_argument("--db", default=job_store.DB_FILE, help="Job store database file")
+    parser.add_argument("--rebuild", action="store_true", help="Recount the rollups from the whole jobs table")
+    parser.add_argument("--source", help="Only ads of this source")
+    parser.add_argument("--since", help="Only ads from this date (YYYY-MM-DD)")
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("summary", help=f"Write the statistics page ({STATS_FILE})")
+    employers_parser = subcommands.add_parser("employers", help="Print the employers with the most ads")
+    employers_parser.add_argument("--category", help="e.g. Non-Consultancy")
+    employers_parser.add_argument("--limit", type=int, default=TOP_EMPLOYERS)
+    subcommands.add_parser("weekly", help="Print ads per employer per week")
+    share_parser = subcommands.add_parser("share", help="Print the consultancy share per period")
+    share_parser.add_argument("--period", choices=PERIODS, default="month")
+    keywords_parser = subcommands.add_parser("keywords", help="Print title keyword counts per period")
+    keywords_parser.add_argument("--period", choices=PERIODS, default="month")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    refresh(conn, rebuild=args.rebuild)
+    if args.command == "summary":
+        write_summary(conn)
+    elif args.command == "employers":
+        for employer, ads in top_employers(conn, args.since, category=args.category, source=args.source,
+                                           limit=args.limit):
+            print(f"{ads}\t{employer}")
+    elif args.command == "weekly":
+        for week, employer, ads in ads_per_employer(conn, "week", args.since, args.source):
+            print(f"{week}\t{employer}\t{ads}")
+    elif args.command == "share":
+        for key, consultancy, total, share in consultancy_share(conn, args.period, args.since, args.source):
+            print(f"{key}\t{consultancy}/{total}\t{share:.0%}")
+    elif args.command == "keywords":
+        for key, keyword, ads in keyword_trends(conn, args.period, args.since, args.source):
+            print(f"{key}\t{keyword}\t{ads}")
+    conn.close()
+    metrics.export(run="analytics")
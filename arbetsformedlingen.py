@@ -1,14 +1,33 @@
 import requests
-import pandas as pd
-from datetime import datetime
-from collections import Counter
-import os
+from datetime import date, datetime, timedelta
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import analytics
+import crawl_planner
+import http_client
+from classifier import DEFAULT_CLASSIFIER
+import job_store
+import metrics
+import pipeline
+import render
+import search_index
+from records import Job
 
 # --- Configuration ---
 API_URL = "https://jobsearch.api.jobtechdev.se/search"
 HEADERS = {"accept": "application/json"}
+PAGE_LIMIT = crawl_planner.PAGE_LIMIT  # Maximum page size accepted by the search API
+MAX_OFFSET = 2000  # The search API rejects offsets above this
+CONCURRENCY = crawl_planner.CONCURRENCY  # Number of pages fetched in parallel
+PAGE_RETRIES = crawl_planner.PAGE_RETRIES  # Times a failed page is fetched again before it is given up
 MUNICIPALITY_CODE = "1480"  # Göteborg
 OCCUPATION_FIELD = "apaJ_2ja_LuF"  # Data/IT field
+# Scope of the sharded crawl, see crawl_planner. Göteborg only, as the outputs are
+# named for it; tuple(crawl_planner.VASTRA_GOTALAND) widens it to the whole region.
+MUNICIPALITIES = (MUNICIPALITY_CODE,)
+OCCUPATION_FIELDS = (OCCUPATION_FIELD,)
 SEARCH_QUERY = (
     "developer", "engineer", "utvecklare", "systemutvecklare", "programmerare",
     "software", "mjukvaruutvecklare", "systemdeveloper", "backend", "frontend",
@@ -17,163 +36,280 @@ SEARCH_QUERY = (
     "ai", "ml", "data scientist", "data analyst", "fullstack", "webb", "mobile",
     "android", "ios", "typescript", "javascript", "react", "vue", "dotnet", "ci/cd"
 )
-NON_CONSULTANCY_COMPANIES = [
-    "Etraveli Group AB","Volvo Personvagnar AB", "Gotit", "Volvo Car Corporation", "Mullvad VPN", "Trafikverket", "Skatteverket",
-    "Jeppesen", "Hogia HR Systems AB", "Hogia Infrastructure Products AB", "Hogia Facility Management AB",
-    "Hogia Business Products AB", "deepNumbers systems AB", "Åre Kommun", "Provide IT Sweden AB", "Acoem AB",
-    "Icomera AB", "Volvo Group", "Drakryggen", "Saab AB", "Qamcom", "Humly", "Compary AB", "Assemblin",
-    "QRTECH", "Novacura", "NOVENTUS SYSTEMS AKTIEBOLAG", "Polismyndigheten", "SOLTAK AB", "Göteborg Energi",
-    "Vipas AB", "HaleyTek AB", "Zacco Digital Trust", "Autocom", "Benify", "Logikfabriken AB", "DENTSPLY IH AB",
-    "Cambio", "Nexus - Powered by IN Groupe", "Skandia", "SJ AB", "Epiroc", "Hitachi Energy", "Pensionsmyndigheten",
-    "Nordea", "Expleo Technology Nordic AB", "Scania CV AB", "Din Psykolog Sverige AB", "Wehype", "Flower",
-    "Tutus Data", "Xensam", "BAE Systems Hägglunds AB", "ITAB", "RASALA Group AB"
-]
-
-CONSULTANCY_COMPANIES = [
-    "Academic Work", "Academic Work Sweden AB", "Quest Consulting Sverige AB", "Jobnet AB", "Quest Consulting Sverige AB","Explipro Group", "Explipro Group AB", "Mission Consultancy Assistance Sweden AB", "EdZa AB", "Knightec AB", "Friday Väst AB", "randstad ab", "Futuria People AB", "Goismo AB","MODERNERA AB", "Nexer Tech Talent AB", "NEXER GROUP", "Sebratec Gothenburg", "Rapid Consulting Sweden AB",
-    "Deploja AB", "Integro Consulting AB", "Zcelero AB", "Framtiden AB", "Sogeti", "IBM Client Innovation Center Sweden AB",
-    "Knowit Sweden", "Castra", "Annvin AB", "XLNT Recruitment Group", "TNG Group AB", "5 Monkeys Agency AB",
-    "Nexer Recruit", "H Sustain AB", "B3 Consulting Group", "Prevas", "JP IT-Konsult i Stockholm AB", "Decerno",
-    "AFRY AB", "Arctic Group"
-]
+# Fields of the raw API hits used by process_jobs
+RAW_COLUMNS = ["headline", "employer.name", "description.text", "publication_date", "webpage_url"]
 
 OUTPUT_FILE = "filtered_jobs_gothenburg.csv"
 HTML_FILE = "public/arbetsformedlingen.html"
+INDEX_DIR = "public/data/arbetsformedlingen"  # JSON shards and search index for public/search.js
+CSV_COLUMNS = ["Title", "Employer", "Category", "Date", "Job Link"]
+SOURCE = "arbetsformedlingen"
+INCREMENTAL = True  # Only fetch ads published since the last run and merge them into the job store
+SUMMARY_DAYS = 30  # Period of the category summary printed after a crawl
 
 # --- Functions ---
-def fetch_jobs(query, municipality, occupation_field):
+def fetch_page(query, municipality, occupation_field, offset, limit=PAGE_LIMIT, published_after=None,
+               published_before=None):
     """
-    Fetch all relevant jobs from the API.
+    Fetch a single page of search results. Retries and backoff are handled by http_client.
+    Query terms and municipalities may be lists. Returns the decoded JSON body, or None
+    if the page could not be fetched.
     """
-    print(f"[{datetime.now()}] Fetching job data...")
-    all_jobs = []
-    offset = 0
-    limit = 50
-
-    while True:
-        params = {
-            "q": query,  # Expanded query for better coverage
-            "municipality": municipality,
-            "occupation-field": occupation_field,
-            "limit": limit,
-            "offset": offset
-        }
-        response = requests.get(API_URL, headers=HEADERS, params=params)
-        if response.status_code == 400:
-            print(f"[ERROR] Bad request. Response: {response.text}")
-            break
-        if response.status_code != 200:
-            print(f"[ERROR] Unable to fetch data. Status Code: {response.status_code}")
-            break
+    params = {
+        "q": query,  # Expanded query for better coverage
+        "municipality": municipality,
+        "occupation-field": occupation_field,
+        "sort": "pubdate-desc",
+        "limit": limit,
+        "offset": offset
+    }
+    if published_after:
+        params["published-after"] = f"{published_after}T00:00:00"
+    if published_before:
+        params["published-before"] = f"{published_before}T00:00:00"
+    try:
+        response = http_client.get(API_URL, headers=HEADERS, params=params)
+    except requests.RequestException as e:
+        print(f"[ERROR] Request for offset {offset} failed: {e}")
+        return None
+    if response.status_code == 400:
+        print(f"[ERROR] Bad request. Response: {response.text}")
+        return None
+    if response.status_code != 200:
+        print(f"[ERROR] Unable to fetch offset {offset}. Status Code: {response.status_code}")
+        return None
+    metrics.inc("pages_total", source=SOURCE)
+    return response.json()
+
+def iter_pages(query, municipality, occupation_field, concurrency=CONCURRENCY, published_after=None,
+               failures=None):
+    """
+    Yield the hits of every result page, in offset order.
 
-        jobs = response.json().get("hits", [])
-        if not jobs:
+    The first page is fetched on its own to read `total.value`; the remaining offsets are
+    then fetched in parallel by a bounded thread pool that keeps at most `concurrency`
+    pages in flight ahead of the consumer. A page that fails is submitted again, up to
+    PAGE_RETRIES times, without restarting the crawl; the offsets of pages that still
+    fail are appended to the `failures` list, if given.
+    With `published_after` (YYYY-MM-DD) only ads published on or after that day are fetched.
+    """
+    def give_up(offset):
+        print(f"[ERROR] Missing results for offset {offset}, giving up.")
+        metrics.inc("failed_pages_total")
+        if failures is not None:
+            failures.append(offset)
+
+    print(f"[{datetime.now()}] Fetching job data"
+          f"{f' published after {published_after}' if published_after else ''}...")
+    first_page = None
+    for _ in range(1 + PAGE_RETRIES):
+        first_page = fetch_page(query, municipality, occupation_field, 0, published_after=published_after)
+        if first_page:
             break
+    if not first_page:
+        give_up(0)
+        return
+
+    total = min(first_page.get("total", {}).get("value", 0), MAX_OFFSET + PAGE_LIMIT)
+    yield first_page.get("hits", [])
+    del first_page
+    offsets = iter(range(PAGE_LIMIT, total, PAGE_LIMIT))
+    page_count = len(range(PAGE_LIMIT, total, PAGE_LIMIT))
+    if not page_count:
+        return
 
-        all_jobs.extend(jobs)
-        offset += limit
+    print(f"[{datetime.now()}] {total} jobs reported, fetching {page_count} more pages "
+          f"with {concurrency} workers...")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        def submit(offset, attempt=0):
+            return offset, attempt, executor.submit(fetch_page, query, municipality, occupation_field, offset,
+                                                    published_after=published_after)
 
+        in_flight = deque(submit(offset) for offset in islice(offsets, max(1, concurrency)))
+        while in_flight:
+            offset, attempt, future = in_flight.popleft()
+            page = future.result()
+            if page is None:
+                if attempt < PAGE_RETRIES:
+                    metrics.inc("page_retries_total")
+                    in_flight.appendleft(submit(offset, attempt + 1))  # Keeps the offset order
+                else:
+                    give_up(offset)
+                continue
+            next_offset = next(offsets, None)
+            if next_offset is not None:
+                in_flight.append(submit(next_offset))
+            yield page.get("hits", [])
+
+def fetch_jobs(query, municipality, occupation_field, concurrency=CONCURRENCY, published_after=None,
+               failures=None):
+    """
+    Fetch all relevant jobs from the API, see `iter_pages`.
+    """
+    all_jobs = []
+    for hits in iter_pages(query, municipality, occupation_field, concurrency, published_after, failures):
+        all_jobs.extend(hits)
     print(f"[{datetime.now()}] Fetched a total of {len(all_jobs)} jobs.")
     return all_jobs
 
+def iter_jobs(query, municipality, occupation_field, concurrency=CONCURRENCY, published_after=None,
+              failures=None):
+    """
+    Yield processed jobs page by page; each page's raw hits are released once processed.
+    """
+    for hits in iter_pages(query, municipality, occupation_field, concurrency, published_after, failures):
+        yield from process_jobs(hits)
+
+def iter_region_pages(published_after=None, concurrency=CONCURRENCY, failures=None):
+    """
+    Yield the raw hits of every result page of the municipalities and occupation
+    fields in scope, crawled as shards that each fit the API's paging limit (see
+    crawl_planner). The (shard, offset) of pages that could not be fetched are
+    appended to `failures`.
+    """
+    shards = crawl_planner.initial_shards(MUNICIPALITIES, OCCUPATION_FIELDS, SEARCH_QUERY, published_after)
+    planner = crawl_planner.Planner(fetch_page, concurrency)
+    try:
+        yield from planner.pages(shards)
+    finally:
+        if failures is not None:
+            failures.extend(planner.failed)
+
+def iter_region_jobs(published_after=None, concurrency=CONCURRENCY, failures=None):
+    """
+    Yield processed jobs of every municipality and occupation field in scope, see
+    `iter_region_pages`.
+    """
+    for hits in iter_region_pages(published_after, concurrency, failures):
+        if hits:
+            yield from process_jobs(hits)
+
 def classify_job(employer, description):
     """
     Classify job based on employer and description.
     """
-    employer = employer.lower()
-    description = description.lower()
-
     # Use predefined lists for classification
-    if any(company.lower() in employer for company in NON_CONSULTANCY_COMPANIES):
-        return "Non-Consultancy"
-    if any(company.lower() in employer for company in CONSULTANCY_COMPANIES):
-        return "Consultancy"
+    category = DEFAULT_CLASSIFIER.classify(employer)
+    if category:
+        return category
 
     # Fallback classification
-    if "consult" in employer or "consultancy" in description:
+    if "consult" in employer.lower() or "consultancy" in description.lower():
         return "Consultancy"
     return "Uncategorized"
 
-def process_jobs(jobs):
+def process_jobs_frame(jobs):
     """
-    Process and categorize jobs.
+    Process and categorize jobs column-wise. Returns a DataFrame with the output columns.
+
+    The raw hits are flattened once with json_normalize and employers are classified
+    once per distinct name. The description is kept last for the job store's search index.
     """
-    processed_jobs = []
-    for job in jobs:
-        employer = job.get("employer", {}).get("name", "").strip()
-        description = job.get("description", {}).get("text", "").strip().lower()
-        title = job.get("headline", "").strip()
-        date = job.get("publication_date", "")[:10]  # Extract date part
-        job_link = job.get("webpage_url", "")
+    import pandas as pd  # Imported on first use, it dominates the start-up time otherwise
+
+    raw = pd.json_normalize(jobs, max_level=1).reindex(columns=RAW_COLUMNS)
+    frame = pd.DataFrame({
+        "Title": raw["headline"].fillna("").astype(str).str.strip(),
+        "Employer": raw["employer.name"].fillna("").astype(str).str.strip(),
+        "Date": raw["publication_date"].fillna("").astype(str).str[:10],  # Extract date part
+        "Job Link": raw["webpage_url"].fillna("").astype(str),
+    })
+    description = raw["description.text"].fillna("").astype(str)
+    mentions_consultancy = description.str.contains("consultancy", case=False, regex=False)
+    del raw
 
-        category = classify_job(employer, description)
+    # Use predefined lists for classification, once per distinct employer
+    employers = frame["Employer"].unique()
+    category = frame["Employer"].map(dict(zip(employers, map(DEFAULT_CLASSIFIER.classify, employers))))
 
-        processed_jobs.append({
-            "Title": title,
-            "Employer": employer,
-            "Category": category,
-            "Date": date,
-            "Job Link": job_link
-        })
+    # Fallback classification
+    fallback = frame["Employer"].str.contains("consult", case=False, regex=False) | mentions_consultancy
+    category = category.fillna(fallback.map({True: "Consultancy", False: "Uncategorized"}))
+    frame.insert(2, "Category", category.astype("category"))
+    frame["Description"] = description
+    return frame
 
-    return processed_jobs
+@metrics.timed("parse_seconds", source=SOURCE)
+def process_jobs(jobs):
+    """
+    Process and categorize jobs into Job records.
+    """
+    frame = process_jobs_frame(jobs)
+    return [
+        Job(title, employer, date, link, category, description=description)
+        for title, employer, category, date, link, description in zip(
+            frame["Title"], frame["Employer"], frame["Category"], frame["Date"], frame["Job Link"],
+            frame["Description"],
+        )
+    ]
 
 def save_to_csv(jobs, filename):
     """
-    Save processed jobs to a CSV file.
+    Save processed jobs to a CSV file, writing rows as they arrive.
     """
-    pd.DataFrame(jobs).to_csv(filename, index=False)
-    print(f"[{datetime.now()}] Saved {len(jobs)} jobs to {filename}.")
+    return pipeline.drain(jobs, pipeline.CsvSink(filename, CSV_COLUMNS))
 
 def save_to_html(jobs, filename):
     """
-    Save jobs to an HTML file grouped by date.
-    """
-    grouped_jobs = {}
-    for job in jobs:
-        pub_date = job["Date"]
-        if pub_date not in grouped_jobs:
-            grouped_jobs[pub_date] = []
-        grouped_jobs[pub_date].append(job)
-
-    sorted_dates = sorted(grouped_jobs.keys(), reverse=True)
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write("<html><head><title>Job Listings</title>")
-        file.write("<link rel='stylesheet' href='styles.css'></head><body>")
-        file.write("<h1>Job Listings by Date</h1>")
-
-        for date in sorted_dates:
-            file.write(f"<h2>Jobs from {date}</h2>")
-            file.write("<table><tr><th>Title</th><th>Employer</th><th>Category</th><th>Date</th><th>Job Link</th></tr>")
-            for job in grouped_jobs[date]:
-                file.write("<tr>")
-                file.write(f"<td>{job['Title']}</td>")
-                file.write(f"<td>{job['Employer']}</td>")
-                file.write(f"<td>{job['Category']}</td>")
-                file.write(f"<td>{job['Date']}</td>")
-                file.write(f"<td><a href='{job['Job Link']}' target='_blank'>View Job</a></td>")
-                file.write("</tr>")
-            file.write("</table>")
-        file.write("</body></html>")
-    print(f"[{datetime.now()}] Saved jobs to HTML file: {filename}")
+    Save jobs to an HTML file grouped by date, writing rows as they arrive.
+    Jobs must be sorted by date.
+    """
+    return pipeline.drain(jobs, render.SiteSink(filename, CSV_COLUMNS))
 
-# --- Main ---
-if __name__ == "__main__":
-    print(f"[{datetime.now()}] Starting job fetch process...")
+def crawl(conn):
+    """
+    Fetch jobs into the job store (only those published since the last run when
+    INCREMENTAL), see connectors.ArbetsformedlingenConnector.
+    Returns (new job count, job counts by category).
+    """
+    import connectors  # Imports this module
+
+    job_counts = Counter()
+    new_count = connectors.crawl(SOURCE, conn, tap=lambda jobs: pipeline.count_by(jobs, "Category", job_counts))
+    return new_count, job_counts
+
+def print_summary(conn):
+    """
+    Fold the new ads into the analytics rollups and summarize the recent ones from there.
+    """
+    analytics.refresh(conn)
+    since = (date.today() - timedelta(days=SUMMARY_DAYS)).isoformat()
+    for _, counts, total in analytics.category_shares(conn, None, since, SOURCE):
+        shares = ", ".join(f"{category} {ads / total:.0%}" for category, ads in sorted(counts.items()))
+        print(f"[{datetime.now()}] Last {SUMMARY_DAYS} days: {total} ads ({shares}).")
+
+def publish(conn):
+    """
+    Save the stored jobs to CSV and HTML.
+    """
+    pipeline.drain(
+        job_store.iter_jobs(conn, SOURCE),
+        pipeline.CsvSink(OUTPUT_FILE, CSV_COLUMNS),
+        render.SiteSink(HTML_FILE, CSV_COLUMNS, search_index="data/arbetsformedlingen/index.json", namespace=SOURCE),
+        search_index.SearchIndexSink(INDEX_DIR),
+    )
 
-    jobs = fetch_jobs(SEARCH_QUERY, MUNICIPALITY_CODE, OCCUPATION_FIELD)
-    if not jobs:
-        print("[ERROR] No jobs fetched. Exiting.")
-        exit()
+def main():
+    print(f"[{datetime.now()}] Starting job fetch process...")
 
-    processed_jobs = process_jobs(jobs)
+    conn = job_store.connect()
+    try:
+        new_count, _ = crawl(conn)
+    except RuntimeError as e:
+        print(f"[ERROR] {e} Exiting.")
+        conn.close()
+        exit(1)
 
     # Save to CSV and HTML
-    save_to_csv(processed_jobs, OUTPUT_FILE)
-    save_to_html(processed_jobs, HTML_FILE)
+    if new_count or not INCREMENTAL:
+        publish(conn)
+    else:
+        print(f"[{datetime.now()}] Outputs left unchanged.")
+    conn.close()
 
-    job_counts = Counter(job["Category"] for job in processed_jobs)
-    print(f"[{datetime.now()}] Job counts by category: {job_counts}")
     print(f"[{datetime.now()}] Job fetch process completed.")
+
+# --- Main ---
+if __name__ == "__main__":
+    main()
+    metrics.export(run=SOURCE)
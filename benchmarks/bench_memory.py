@@ -0,0 +1,85 @@
+"""
+Memory benchmark of in-memory job sets: the same synthetic ads held as plain dicts
+(as the scrapers produced them before records.Job) and as Job records.
+
+Every value is a fresh string object, as it is when parsed from HTML or JSON, so the
+dicts pay for each repeated employer, category, date and source; Job interns those.
+Sizes are measured with tracemalloc. Run from the repository root:
+
+    python benchmarks/bench_memory.py [--scale 100000 300000] [--description]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from records import Job  # noqa: E402
+
+CATEGORIES = ["Consultancy", "Non-Consultancy", "Uncategorized"]
+
+
+def fresh(value):
+    # A new string object with the same value, as a parser would return
+    return value.encode("utf-8").decode("utf-8")
+
+
+def raw_fields(count, description):
+    for index, record in enumerate(synthetic.records(count)):
+        yield (
+            fresh(record["Title"]), fresh(record["Employer"]), fresh(CATEGORIES[index % 3]), fresh(record["Date"]),
+            fresh(record["Job Link"]), fresh(record["Source"]),
+            fresh(" ".join(synthetic.SENTENCES)) if description else None,
+        )
+
+
+def as_dicts(fields):
+    jobs = []
+    for title, employer, category, date, link, source, description in fields:
+        job = {"Source": source, "Title": title, "Employer": employer, "Category": category, "Date": date,
+               "Job Link": link}
+        if description:
+            job["Description"] = description
+        jobs.append(job)
+    return jobs
+
+
+def as_jobs(fields):
+    return [Job(title, employer, date, link, category, source, description)
+            for title, employer, category, date, link, source, description in fields]
+
+
+def measure(build, count, description):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    jobs = build(raw_fields(count, description))
+    seconds = time.perf_counter() - started
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del jobs
+    return size, peak, seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[100_000, 300_000], help="Numbers of ads")
+    parser.add_argument("--description", action="store_true", help="Give every ad a description text")
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        print(f"\n{scale:,} ads{' with descriptions' if args.description else ''}")
+        results = {}
+        for name, build in (("dict", as_dicts), ("Job", as_jobs)):
+            size, peak, seconds = measure(build, scale, args.description)
+            results[name] = size
+            print(f"  {name:5} {size / 2**20:9.1f} MiB held  {size / scale:7.0f} B/ad  "
+                  f"peak {peak / 2**20:8.1f} MiB  built in {seconds:.2f} s")
+        print(f"  Job records hold {1 - results['Job'] / results['dict']:.0%} less.")
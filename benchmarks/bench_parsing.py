@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the HTML extraction backends over the saved pages in fixtures/html.
+
+Compares the original full-tree html.parser walk with every available backend of
+html_parsing, checks that all of them extract identical entries, and prints the
+time per page. Run from the repository root:
+
+    python benchmarks/bench_parsing.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "html")
+
+
+# --- Baseline: the extraction as it was done before html_parsing ---
+def legacy_vakanser(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    entries = []
+    for section in soup.find_all("section", class_="section"):
+        for span in section.find_all("span", style="float: right; color: green;"):
+            title_tag = span.find_next("a")
+            entries.append((
+                span.find_next_sibling(string=True),
+                title_tag.text if title_tag else None,
+                title_tag.get("href") if title_tag else None,
+            ))
+    return entries
+
+def legacy_platsbanken(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    cards = []
+    for card in soup.find_all("div", class_="job-card"):
+        title_tag = card.find("h3", class_="job-card-title")
+        employer_tag = card.find("span", class_="job-card-company")
+        date_tag = card.find("time", class_="job-card-date")
+        link_tag = card.find("a", href=True)
+        cards.append({
+            "title": title_tag.text if title_tag else None,
+            "employer": employer_tag.text if employer_tag else None,
+            "date": date_tag.get("datetime") if date_tag else None,
+            "href": link_tag["href"] if link_tag else None,
+        })
+    return cards
+
+
+def variants(extract):
+    """
+    Yield (name, function) for every backend available in this environment.
+    """
+    yield "bs4 html.parser (strained)", lambda html: extract(html, backend="bs4", parser="html.parser")
+    if html_parsing.BS4_PARSER == "lxml":
+        yield "bs4 lxml (strained)", lambda html: extract(html, backend="bs4", parser="lxml")
+    if html_parsing.LexborHTMLParser:
+        yield "selectolax", lambda html: extract(html, backend="selectolax")
+
+
+def run(repeat):
+    cases = [
+        ("vakanser_page.html", legacy_vakanser, html_parsing.extract_vakanser),
+        ("platsbanken_page.html", legacy_platsbanken, html_parsing.extract_platsbanken),
+    ]
+    for filename, legacy, extract in cases:
+        with open(os.path.join(FIXTURE_DIR, filename), "rb") as file:
+            html_content = file.read()
+        expected = legacy(html_content)
+        baseline = min(timeit.repeat(lambda: legacy(html_content), number=repeat, repeat=3)) / repeat
+
+        print(f"\n{filename} ({len(html_content) / 1024:.0f} KiB, {len(expected)} entries)")
+        print(f"  {'legacy html.parser (full tree)':32} {baseline * 1000:8.2f} ms/page")
+        for name, function in variants(extract):
+            if function(html_content) != expected:
+                sys.exit(f"{name} output differs from the legacy extraction for {filename}")
+            elapsed = min(timeit.repeat(lambda: function(html_content), number=repeat, repeat=3)) / repeat
+            print(f"  {name:32} {elapsed * 1000:8.2f} ms/page  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="Parses per timing run")
+    run(parser.parse_args().repeat)
@@ -0,0 +1,326 @@
+"""
+Benchmark suite of the scraping pipeline: every stage on its own and the whole
+pipeline end to end, on synthetic data scaled up from the recorded fixtures (see
+synthetic.py). Fetching runs against a local stub of the JobTech APIs with an
+artificial per-request latency, so the effect of fetch concurrency is visible.
+
+Each result is appended to benchmarks/results.jsonl together with the current git
+commit; --compare prints the change against the previous results (or those of a commit).
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py [--scale 10000 100000] [--only parse classify] [--compare [REF]]
+
+Stages: parse, classify, dedupe, merge, store, csv, render, index, fetch, end_to_end.
+Fetching is capped at the search API's offset limit (2100 ads per query).
+"""
+import argparse
+import contextlib
+import http.server
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from itertools import cycle, islice
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import arbetsformedlingen  # noqa: E402
+import dedup  # noqa: E402
+import http_client  # noqa: E402
+import index  # noqa: E402
+import job_store  # noqa: E402
+import jobtech_stream  # noqa: E402
+import metrics  # noqa: E402
+import pipeline  # noqa: E402
+import render  # noqa: E402
+import search_index  # noqa: E402
+import synthetic  # noqa: E402
+import vakanser  # noqa: E402
+from classifier import CONSULTANCY_COMPANIES, NON_CONSULTANCY_COMPANIES, EmployerClassifier  # noqa: E402
+
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+HIT_POOL = 10_000  # Distinct raw hits cycled through by the classify stage
+LATENCY = 0.02  # Seconds the stub server waits before answering
+
+
+# --- Stub API server ---
+class StubApi:
+    """
+    Local stand-in for the search API (/search) and the stream API (/snapshot),
+    serving `count` synthetic ads.
+    """
+
+    def __init__(self, count, latency=None):
+        self.count = count
+        self.latency = LATENCY if latency is None else latency
+        self.requests = 0
+        self.snapshot = None
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, as the real API
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                parts = urlsplit(self.path)
+                if parts.path == "/search":
+                    query = parse_qs(parts.query)
+                    offset = int(query.get("offset", ["0"])[0])
+                    limit = int(query.get("limit", ["100"])[0])
+                    body = json.dumps({
+                        "total": {"value": stub.count},
+                        "hits": list(synthetic.api_hits(stub.count, offset, offset + limit)),
+                    }).encode("utf-8")
+                elif parts.path == "/snapshot":
+                    if stub.snapshot is None:
+                        stub.snapshot = json.dumps(list(synthetic.api_hits(stub.count))).encode("utf-8")
+                    body = stub.snapshot
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- Stages ---
+# Every stage takes (scale, data, workdir) and returns the number of items processed.
+def stage_parse(scale, data, workdir):
+    count = 0
+    for page, parse in ((data["vakanser_page"], vakanser.parse_html), (data["platsbanken_page"], index.parse_html)):
+        per_page = len(parse(page))
+        for _ in range(max(1, scale // per_page // 2)):
+            count += len(parse(page))
+    return count
+
+
+def stage_classify(scale, data, workdir):
+    count = 0
+    hits = cycle(data["hits"])
+    while count < scale:
+        page = list(islice(hits, min(arbetsformedlingen.PAGE_LIMIT, scale - count)))
+        count += len(arbetsformedlingen.process_jobs(page))
+    return count
+
+
+def stage_classify_uncached(scale, data, workdir):
+    classifier = EmployerClassifier(NON_CONSULTANCY_COMPANIES, CONSULTANCY_COMPANIES, cache_size=0)
+    for record in data["records"]:
+        classifier.classify(record["Employer"])
+    return len(data["records"])
+
+
+def stage_dedupe(scale, data, workdir):
+    return sum(1 for _ in pipeline.dedupe(data["records"]))
+
+
+def stage_merge(scale, data, workdir):
+    dedup.merge(data["records"])
+    return len(data["records"])
+
+
+def stage_store(scale, data, workdir):
+    conn = job_store.connect(os.path.join(workdir, "store.sqlite"))
+    try:
+        job_store.merge_jobs(conn, "benchmark", data["records"])
+    finally:
+        conn.close()
+    return len(data["records"])
+
+
+def stage_csv(scale, data, workdir):
+    sink = pipeline.CsvSink(os.path.join(workdir, "jobs.csv"), arbetsformedlingen.CSV_COLUMNS)
+    return pipeline.drain(data["records"], sink)
+
+
+def stage_render(scale, data, workdir):
+    shutil.rmtree(os.path.join(workdir, "render_cache"), ignore_errors=True)
+    sink = render.SiteSink(os.path.join(workdir, "public", "jobs.html"), arbetsformedlingen.CSV_COLUMNS,
+                           cache_dir=os.path.join(workdir, "render_cache"))
+    return pipeline.drain(data["records"], sink)
+
+
+def stage_render_unchanged(scale, data, workdir):
+    # Second render of the same records: everything is served from the fragment cache
+    sink = render.SiteSink(os.path.join(workdir, "public", "jobs.html"), arbetsformedlingen.CSV_COLUMNS,
+                           cache_dir=os.path.join(workdir, "render_cache"))
+    return pipeline.drain(data["records"], sink)
+
+
+def stage_index(scale, data, workdir):
+    return pipeline.drain(data["records"], search_index.SearchIndexSink(os.path.join(workdir, "public", "data")))
+
+
+def fetch_stage(concurrency):
+    def stage_fetch(scale, data, workdir):
+        with StubApi(scale) as stub:
+            arbetsformedlingen.API_URL = f"{stub.url}/search"
+            hits = arbetsformedlingen.iter_pages("", "1480", "apaJ_2ja_LuF", concurrency=concurrency)
+            return sum(len(page) for page in hits)
+    return stage_fetch
+
+
+def stage_end_to_end(scale, data, workdir):
+    # Full sync from the stream API snapshot into a fresh store, then publish CSV, HTML and index
+    with StubApi(scale, latency=0) as stub:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            shutil.rmtree("public", ignore_errors=True)
+            shutil.rmtree("render_cache", ignore_errors=True)
+            conn = job_store.connect("e2e.sqlite")
+            try:
+                jobtech_stream.sync(conn, stub.url)
+                arbetsformedlingen.publish(conn)
+            finally:
+                conn.close()
+                os.remove("e2e.sqlite")
+        finally:
+            os.chdir(cwd)
+    return scale
+
+
+STAGES = {
+    "parse": stage_parse,
+    "classify": stage_classify,
+    "classify_uncached": stage_classify_uncached,
+    "dedupe": stage_dedupe,
+    "merge": stage_merge,
+    "store": stage_store,
+    "csv": stage_csv,
+    "render": stage_render,
+    "render_unchanged": stage_render_unchanged,
+    "index": stage_index,
+    "fetch_serial": fetch_stage(1),
+    f"fetch_concurrent_{arbetsformedlingen.CONCURRENCY}": fetch_stage(arbetsformedlingen.CONCURRENCY),
+    "end_to_end": stage_end_to_end,
+}
+FETCH_CAP = arbetsformedlingen.MAX_OFFSET + arbetsformedlingen.PAGE_LIMIT  # The search API pages no further
+
+
+# --- Runner ---
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def prepare(scale):
+    return {
+        "records": list(synthetic.records(scale)),
+        "hits": list(synthetic.api_hits(scale, 0, HIT_POOL)),
+        "vakanser_page": synthetic.html_page("vakanser_page.html"),
+        "platsbanken_page": synthetic.html_page("platsbanken_page.html"),
+    }
+
+
+def run(scales, names, repeat, latency):
+    global LATENCY
+    LATENCY = latency
+    http_client.configure_cache(mode="off")
+    metrics.EVENTS_FILE = ""  # Counters still run, as in production, but nothing is written
+    http_client.HOST_RATE_LIMITS["127.0.0.1"] = (1e9, 1e9)
+    vakanser.target_date_obj = datetime(2000, 1, 1)  # Do not stop at the fixture's dates
+
+    commit, dirty = git_commit()
+    results = []
+    for scale in scales:
+        data = prepare(scale)
+        print(f"\n{scale} ads (commit {commit}{' + local changes' if dirty else ''})")
+        for name in names:
+            stage_scale = min(scale, FETCH_CAP) if name.startswith("fetch") else scale
+            times = []
+            with tempfile.TemporaryDirectory() as workdir:
+                for _ in range(repeat):
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        started = time.perf_counter()
+                        items = STAGES[name](stage_scale, data, workdir)
+                        times.append(time.perf_counter() - started)
+            seconds = min(times)
+            print(f"  {name:24} {seconds:9.3f} s  {items / seconds:12,.0f} items/s  ({items:,} items)")
+            results.append({
+                "commit": commit, "dirty": dirty, "time": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(), "stage": name, "scale": scale,
+                "items": items, "seconds": round(seconds, 6),
+            })
+    with open(RESULTS_FILE, "a", encoding="utf-8") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+    return results
+
+
+def compare(results, reference=None):
+    """
+    Print the change of every result against the latest earlier result of the same
+    stage and scale, from commit `reference` if given.
+    """
+    try:
+        with open(RESULTS_FILE, encoding="utf-8") as file:
+            history = [json.loads(line) for line in file if line.strip()]
+    except OSError:
+        history = []
+    history = history[:len(history) - len(results)]  # Without the results of this run
+    baseline = {}
+    for entry in history:
+        if reference and not entry["commit"].startswith(reference):
+            continue
+        baseline[(entry["stage"], entry["scale"])] = entry
+    if not baseline:
+        print("\nNo earlier results to compare with.")
+        return
+    print("\nChange against earlier results (negative is faster):")
+    for result in results:
+        before = baseline.get((result["stage"], result["scale"]))
+        if before:
+            change = (result["seconds"] - before["seconds"]) / before["seconds"] * 100
+            print(f"  {result['stage']:24} {result['scale']:>9}  {before['seconds']:9.3f} s -> "
+                  f"{result['seconds']:9.3f} s  {change:+6.1f}%  (vs {before['commit']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[10_000], help="Numbers of ads (e.g. 10000 1000000)")
+    parser.add_argument("--only", nargs="+", metavar="STAGE",
+                        help="Only stages whose name starts with one of these")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, the fastest is kept")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="Stub server latency in seconds")
+    parser.add_argument("--compare", nargs="?", const="", metavar="REF",
+                        help="Compare with the latest earlier results (of commit REF, if given)")
+    args = parser.parse_args()
+
+    names = [name for name in STAGES if not args.only or name.startswith(tuple(args.only))]
+    results = run(args.scale, names, args.repeat, args.latency)
+    if args.compare is not None:
+        compare(results, args.compare or None)
@@ -0,0 +1,79 @@
+"""
+Start-up benchmark: the import time of every entry point, measured in a fresh
+interpreter with `python -X importtime`, and the heavy packages each one pulls in.
+
+Results are appended to benchmarks/results.jsonl like those of bench_pipeline.py
+(stage "import_<module>"), so --compare shows the change against earlier runs.
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--repeat 5] [--compare [REF]]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from bench_pipeline import RESULTS_FILE, ROOT, compare, git_commit
+
+ENTRY_MODULES = [
+    "scheduler", "connectors", "arbetsformedlingen", "vakanser", "index", "jobtech_stream",
+    "job_store", "deploy", "html_parsing", "analytics",
+]
+HEAVY_PACKAGES = ["pandas", "numpy", "bs4", "lxml", "requests"]  # Reported when imported
+
+
+def import_time(module):
+    """
+    Return (seconds, {top-level package: seconds}) of importing `module` in a new interpreter.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total, packages = None, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        seconds = int(cumulative) / 1e6
+        name = name.rstrip()
+        if name.strip() in HEAVY_PACKAGES:
+            packages[name.strip()] = max(packages.get(name.strip(), 0), seconds)
+        if name == f" {module}":
+            total = seconds
+    return total, packages
+
+
+def run(modules, repeat):
+    commit, dirty = git_commit()
+    print(f"Import times (commit {commit}{' + local changes' if dirty else ''}, best of {repeat})")
+    results = []
+    for module in modules:
+        runs = [import_time(module) for _ in range(repeat)]
+        seconds, packages = min(runs, key=lambda run: run[0])
+        heavy = ", ".join(f"{name} {value * 1000:.0f} ms" for name, value in sorted(packages.items()))
+        print(f"  {module:20} {seconds * 1000:8.1f} ms  {heavy}")
+        results.append({
+            "commit": commit, "dirty": dirty, "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "stage": f"import_{module}", "scale": 0,
+            "items": 1, "seconds": round(seconds, 6),
+        })
+    with open(RESULTS_FILE, "a", encoding="utf-8") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", metavar="MODULE", help="Only these modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module, the fastest is kept")
+    parser.add_argument("--compare", nargs="?", const="", metavar="REF",
+                        help="Compare with the latest earlier results (of commit REF, if given)")
+    args = parser.parse_args()
+
+    results = run(args.only or ENTRY_MODULES, args.repeat)
+    if args.compare is not None:
+        compare(results, args.compare or None)
@@ -0,0 +1,109 @@
+"""
+Synthetic job ads for the benchmarks, scaled up from the recorded data in the repo.
+
+Titles and employers are drawn from the saved CSVs; raw API hits follow the layout of
+fixtures/jobstream/snapshot.json. Everything is deterministic for a given index, so
+the stub server can produce any page without holding the whole data set in memory.
+Ads are generated newest first, as the job store yields them.
+"""
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILES = ["all_jobs_gothenburg.csv", "all_jobs_vakanser.csv"]
+FIXTURE_DIR = os.path.join(ROOT, "fixtures")
+NEWEST = date(2025, 6, 30)
+DAYS = 365  # Ads are spread over this many days
+FIRST_ID = 30_000_000
+
+MODIFIERS = ["Senior", "Junior", "Lead", "Erfaren", "Principal", "Trainee"]
+SUFFIXES = ["", "", "till vår kund i Göteborg", "Göteborg", "- hybrid", "to our client", "(konsultuppdrag)"]
+SENTENCES = [
+    "Vi söker en utvecklare med erfarenhet av {skill}.",
+    "You will work with {skill} in an agile team.",
+    "Meriterande är kunskaper inom {skill} och molntjänster.",
+    "The role includes design, testing and deployment of {skill} services.",
+    "Som konsult hos oss arbetar du med kunder inom fordonsindustrin.",
+]
+SKILLS = ["C++", "Python", "Java", "Kubernetes", "embedded Linux", "React", "Simulink", "AUTOSAR", "SQL", ".NET"]
+
+
+def _load_samples():
+    titles, employers = [], []
+    for filename in SAMPLE_FILES:
+        with open(os.path.join(ROOT, filename), encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                titles.append(row["Title"])
+                employers.append(row["Employer"])
+    return titles, sorted(set(employers))
+
+
+TITLES, EMPLOYERS = _load_samples()
+
+
+def ad_date(index, count):
+    return NEWEST - timedelta(days=index * DAYS // max(count, 1))
+
+
+def title(index):
+    rng = random.Random(index)
+    base = TITLES[index % len(TITLES)]
+    if rng.random() < 0.3:
+        base = f"{rng.choice(MODIFIERS)} {base}"
+    return f"{base} {rng.choice(SUFFIXES)}".strip()
+
+
+def employer(index):
+    return EMPLOYERS[(index * 7919) % len(EMPLOYERS)]
+
+
+def api_hit(index, count):
+    """
+    Raw search/stream API hit number `index` of `count`.
+    """
+    rng = random.Random(-index)
+    ad_id = FIRST_ID + count - index
+    description = " ".join(rng.choice(SENTENCES).format(skill=rng.choice(SKILLS)) for _ in range(4))
+    return {
+        "id": str(ad_id),
+        "headline": title(index),
+        "employer": {"name": employer(index)},
+        "description": {"text": description},
+        "publication_date": f"{ad_date(index, count).isoformat()}T08:00:00",
+        "webpage_url": f"https://arbetsformedlingen.se/platsbanken/annonser/{ad_id}",
+        "workplace_address": {"municipality_code": "1480", "municipality": "Göteborg"},
+        "occupation_field": {"concept_id": "apaJ_2ja_LuF", "label": "Data/IT"},
+    }
+
+
+def api_hits(count, start=0, stop=None):
+    """
+    Yield raw API hits `start`..`stop` of a data set of `count` ads.
+    """
+    for index in range(start, count if stop is None else min(stop, count)):
+        yield api_hit(index, count)
+
+
+def records(count, source="arbetsformedlingen"):
+    """
+    Yield `count` processed job records (the job store's fields), newest first.
+    """
+    for index in range(count):
+        ad_id = FIRST_ID + count - index
+        yield {
+            "Source": source,
+            "Title": title(index),
+            "Employer": employer(index),
+            "Date": ad_date(index, count).isoformat(),
+            "Job Link": f"https://arbetsformedlingen.se/platsbanken/annonser/{ad_id}",
+        }
+
+
+def html_page(name):
+    """
+    Bytes of a saved HTML page from fixtures/html.
+    """
+    with open(os.path.join(FIXTURE_DIR, "html", name), "rb") as file:
+        return file.read()
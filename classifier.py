@@ -0,0 +1,107 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+
+# --- Company lists ---
+NON_CONSULTANCY_COMPANIES = [
+    "Etraveli Group AB","Volvo Personvagnar AB", "Gotit", "Volvo Car Corporation", "Mullvad VPN", "Trafikverket", "Skatteverket",
+    "Jeppesen", "Hogia HR Systems AB", "Hogia Infrastructure Products AB", "Hogia Facility Management AB",
+    "Hogia Business Products AB", "deepNumbers systems AB", "Åre Kommun", "Provide IT Sweden AB", "Acoem AB",
+    "Icomera AB", "Volvo Group", "Drakryggen", "Saab AB", "Qamcom", "Humly", "Compary AB", "Assemblin",
+    "QRTECH", "Novacura", "NOVENTUS SYSTEMS AKTIEBOLAG", "Polismyndigheten", "SOLTAK AB", "Göteborg Energi",
+    "Vipas AB", "HaleyTek AB", "Zacco Digital Trust", "Autocom", "Benify", "Logikfabriken AB", "DENTSPLY IH AB",
+    "Cambio", "Nexus - Powered by IN Groupe", "Skandia", "SJ AB", "Epiroc", "Hitachi Energy", "Pensionsmyndigheten",
+    "Nordea", "Expleo Technology Nordic AB", "Scania CV AB", "Din Psykolog Sverige AB", "Wehype", "Flower",
+    "Tutus Data", "Xensam", "BAE Systems Hägglunds AB", "ITAB", "RASALA Group AB"
+]
+
+CONSULTANCY_COMPANIES = [
+    "Academic Work", "Academic Work Sweden AB", "Quest Consulting Sverige AB", "Jobnet AB", "Quest Consulting Sverige AB","Explipro Group", "Explipro Group AB", "Mission Consultancy Assistance Sweden AB", "EdZa AB", "Knightec AB", "Friday Väst AB", "randstad ab", "Futuria People AB", "Goismo AB","MODERNERA AB", "Nexer Tech Talent AB", "NEXER GROUP", "Sebratec Gothenburg", "Rapid Consulting Sweden AB",
+    "Deploja AB", "Integro Consulting AB", "Zcelero AB", "Framtiden AB", "Sogeti", "IBM Client Innovation Center Sweden AB",
+    "Knowit Sweden", "Castra", "Annvin AB", "XLNT Recruitment Group", "TNG Group AB", "5 Monkeys Agency AB",
+    "Nexer Recruit", "H Sustain AB", "B3 Consulting Group", "Prevas", "JP IT-Konsult i Stockholm AB", "Decerno",
+    "AFRY AB", "Arctic Group"
+]
+
+NON_CONSULTANCY = "Non-Consultancy"
+CONSULTANCY = "Consultancy"
+
+# Legal-form suffixes dropped when normalizing employer names
+LEGAL_SUFFIXES = {"ab", "aktiebolag", "publ", "hb", "kb"}
+
+
+def name_tokens(name):
+    """
+    Lowercase words of a name, with diacritics and punctuation stripped.
+    """
+    name = unicodedata.normalize("NFKD", name.lower())
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return re.findall(r"[a-z0-9+&]+", name)
+
+
+def normalize_name(name):
+    """
+    Normalize an employer name for matching: lowercase, strip diacritics and
+    punctuation, collapse whitespace and drop trailing legal-form suffixes such as "AB".
+    """
+    tokens = name_tokens(name)
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+class EmployerClassifier:
+    """
+    Classify employers against the company lists in a single regex pass.
+
+    All company names are compiled into one alternation that matches on whole words.
+    Names listed without a legal form ("Sogeti", "Volvo Group") match anywhere in the
+    employer name. Names listed with one ("Framtiden AB", "SJ AB") denote that
+    company only: they match with their legal form ("Mgmt by Logikfabriken AB"), or
+    when the employer name without legal form equals theirs ("Knightec"), so
+    "Framtiden i Sverige AB" is not taken for "Framtiden AB". Non-consultancy matches
+    win over consultancy ones, as in the original lists. Results are memoized per
+    distinct employer name.
+    """
+
+    def __init__(self, non_consultancy, consultancy, cache_size=100_000):
+        self.categories = {}  # Name matched as whole words -> category
+        self.exact = {}  # Normalized name of companies listed with a legal form -> category
+        for category, companies in ((CONSULTANCY, consultancy), (NON_CONSULTANCY, non_consultancy)):
+            for company in companies:
+                normalized = normalize_name(company)
+                if not normalized:
+                    continue
+                words = " ".join(name_tokens(company))
+                self.categories[words] = category
+                if words != normalized:  # Listed with a legal form
+                    self.exact[normalized] = category
+        names = sorted(self.categories, key=len, reverse=True)
+        self.pattern = re.compile(r"(?<!\S)(?:" + "|".join(map(re.escape, names)) + r")(?!\S)")
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Build a classifier from a JSON file with "Non-Consultancy" and "Consultancy" lists.
+        """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data.get(NON_CONSULTANCY, []), data.get(CONSULTANCY, []))
+
+    def _classify(self, employer):
+        """
+        Return "Non-Consultancy", "Consultancy" or None if the employer is in neither list.
+        """
+        category = self.exact.get(normalize_name(employer))
+        if category == NON_CONSULTANCY:
+            return category
+        for match in self.pattern.finditer(" ".join(name_tokens(employer))):
+            category = self.categories[match.group(0)]
+            if category == NON_CONSULTANCY:
+                break
+        return category
+
+
+DEFAULT_CLASSIFIER = EmployerClassifier(NON_CONSULTANCY_COMPANIES, CONSULTANCY_COMPANIES)
@@ -0,0 +1,391 @@
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from queue import Empty, Full, Queue
+
+import arbetsformedlingen
+import dedup
+import index
+import job_store
+import metrics
+import pipeline
+import vakanser
+from classifier import DEFAULT_CLASSIFIER
+from records import Job
+
+# Every source is a connector: it fetches pages and parses them into records in one
+# shared schema. The runner crawls all registered connectors in parallel, merges each
+# source into the job store and feeds all records to shared sinks.
+
+# --- Configuration ---
+NORMALIZED_FIELDS = ["Source", "Title", "Employer", "Category", "Date", "Job Link"]
+MERGED_FIELDS = ["Sources", "Title", "Employer", "Category", "Date", "Job Link", "Links"]  # See dedup.Cluster
+FIELD_ALIASES = {"Publication Date": "Date"}  # Field names used by older scrapers
+QUEUE_SIZE = 1000  # Records buffered between the connector threads and the sinks
+OUTPUT_FILE = "all_jobs.csv"
+
+REGISTRY = {}
+
+
+def register(cls):
+    """
+    Class decorator adding a connector to the registry under its `name`.
+    """
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no name")
+    if cls.name in REGISTRY:
+        raise ValueError(f"A connector named {cls.name!r} is already registered")
+    REGISTRY[cls.name] = cls
+    return cls
+
+
+def get_connector(name):
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown connector {name!r}, expected one of {sorted(REGISTRY)}") from None
+
+
+def normalize(record, source):
+    """
+    Map a record from any scraper onto NORMALIZED_FIELDS (plus its Description, if any).
+    """
+    record = {FIELD_ALIASES.get(field, field): value for field, value in record.items()}
+    employer = (record.get("Employer") or "").strip() or "Unknown Employer"
+    date = str(record.get("Date") or "")[:10] or "Unknown Date"
+    category = record.get("Category") or DEFAULT_CLASSIFIER.classify(employer) or "Uncategorized"
+    return Job(
+        title=(record.get("Title") or "").strip() or "Unknown Title",
+        employer=employer,
+        date=date,
+        link=record.get("Job Link") or "N/A",
+        category=category,
+        source=source,
+        description=record.get("Description") or None,  # Only indexed by the job store
+    )
+
+
+# --- Connectors ---
+class Connector:
+    """
+    A job source. Subclasses set `name` and implement `pages` (yield raw pages)
+    and `parse` (raw page -> list of records, or None to stop the crawl).
+
+    A connector crawls incrementally from the state stored for its source when it
+    has a job store connection and `incremental` is true; otherwise it crawls
+    everything. `crawl` merges the records into the store, if there is one.
+    """
+
+    name = None
+    scheduled = True  # Crawled and published by the daily scheduler
+
+    def __init__(self, conn=None, incremental=True):
+        self.conn = conn
+        self.incremental = conn is not None and incremental
+        self.count = 0  # Records yielded so far
+
+    def pages(self):
+        raise NotImplementedError
+
+    def parse(self, page):
+        raise NotImplementedError
+
+    def should_stop(self, records):
+        """
+        Called after each non-empty page; return True to stop the crawl there.
+        """
+        return False
+
+    def complete(self):
+        """
+        Called once the crawl is over; return False if pages were lost, so the
+        stored watermark is not advanced past them.
+        """
+        return True
+
+    def records(self):
+        """
+        Yield normalized records page by page.
+        """
+        pages = iter(self.pages())
+        try:
+            for page in pages:
+                records = self.parse(page)
+                if records is None:
+                    break
+                for record in records:
+                    self.count += 1
+                    yield normalize(record, self.name)
+                if records and self.should_stop(records):
+                    break
+        finally:
+            if hasattr(pages, "close"):
+                pages.close()  # Stops the fetching generator and its in-flight requests
+
+    def crawl(self, tap=None):
+        """
+        Crawl the source and merge its records into the job store, if there is one.
+        `tap` may wrap the record stream (e.g. to count or forward the records).
+        Returns the number of new jobs.
+        """
+        # Same ad twice in one crawl (e.g. overlapping pages); distinct ads may share a title
+        records = pipeline.dedupe(self.records(), key=job_store.job_key)
+        if tap is not None:
+            records = tap(records)
+        if self.conn is None:
+            for _ in records:
+                pass
+            new_count = 0
+        else:
+            new_count = job_store.merge_jobs(self.conn, self.name, records, complete=self.complete)
+        if not self.complete():
+            print(f"[ERROR] {self.name}: some pages could not be fetched, they are retried on the next run.")
+        return new_count
+
+    def publish(self):
+        """
+        Write the source's outputs from the job store. Does nothing by default.
+        """
+
+
+class PagedHtmlConnector(Connector):
+    """
+    A connector for numbered HTML result pages, stopping after `max_empty_pages`
+    missing or empty pages in a row.
+
+    Subclasses set `fetch` (page number -> HTML or None) and `parse_html` (HTML ->
+    records, or None to stop). `parse_html` must be a module-level function, set with
+    staticmethod, as it runs in parser processes (see pipeline.crawl_pages).
+    """
+
+    start_page = 1
+    max_empty_pages = 3
+    fetch = None
+    parse_html = None
+
+    def pages(self):
+        # Yields parsed pages: fetching and parsing overlap in pipeline.crawl_pages
+        return pipeline.crawl_pages(self.fetch, self.parse_html, self.start_page, self.max_empty_pages,
+                                    source=self.name)
+
+    def parse(self, page):
+        return page
+
+
+@register
+class ArbetsformedlingenConnector(Connector):
+    """
+    The JobTech search API, crawled as shards through a shared worker pool; incremental
+    crawls fetch the ads published since the stored watermark.
+    """
+
+    name = arbetsformedlingen.SOURCE
+
+    def __init__(self, conn=None, incremental=True):
+        super().__init__(conn, incremental)
+        self.published_after = None
+        if self.incremental and arbetsformedlingen.INCREMENTAL:
+            self.published_after = job_store.get_watermark(conn, self.name)
+        self.failures = []  # (shard, offset) of pages that could not be fetched
+
+    def pages(self):
+        return arbetsformedlingen.iter_region_pages(self.published_after, failures=self.failures)
+
+    def parse(self, page):
+        return arbetsformedlingen.process_jobs(page) if page else []
+
+    def complete(self):
+        return not self.failures
+
+    def crawl(self, tap=None):
+        new_count = super().crawl(tap)
+        if not self.count and not self.published_after:
+            raise RuntimeError("No jobs fetched.")
+        if not new_count:
+            print(f"[{datetime.now()}] No new jobs since {self.published_after}.")
+        if self.conn is not None:
+            arbetsformedlingen.print_summary(self.conn)
+        return new_count
+
+    def publish(self):
+        arbetsformedlingen.publish(self.conn)
+
+
+@register
+class PlatsbankenConnector(PagedHtmlConnector):
+    """
+    The Platsbanken search result pages.
+    """
+
+    name = index.SOURCE
+    scheduled = False  # Run on demand; index.py renders its own page
+    fetch = staticmethod(index.fetch_html)
+    parse_html = staticmethod(index.parse_html)
+
+
+@register
+class VakanserConnector(Connector):
+    """
+    vakanser.se listings, newest first, down to vakanser.TARGET_DATE or, when
+    incremental, the newest stored date. Incremental crawls also stop at the first
+    page that holds only ads already in the store.
+    """
+
+    name = vakanser.SOURCE
+
+    def __init__(self, conn=None, incremental=True):
+        super().__init__(conn, incremental)
+        self.cutoff = vakanser.target_date_obj.strftime("%Y-%m-%d")
+        self.known_links = None
+        if self.incremental and vakanser.INCREMENTAL:
+            self.known_links = job_store.known_links(conn, self.name)
+            self.cutoff = max(self.cutoff, job_store.get_watermark(conn, self.name) or self.cutoff)
+        self.failures = []  # Page numbers that could not be fetched
+
+    def pages(self):
+        # The listing is sorted by date: locate the last recent page, then fetch the range
+        return vakanser.iter_recent_pages(self.cutoff, failures=self.failures)
+
+    def parse(self, page):
+        return page
+
+    def should_stop(self, records):
+        return self.known_links is not None and vakanser.only_known(records, self.known_links)
+
+    def complete(self):
+        return not self.failures
+
+    def publish(self):
+        vakanser.publish(self.conn)
+
+
+def crawl(name, conn, incremental=True, tap=None):
+    """
+    Crawl one connector into the job store, see Connector.crawl.
+    Returns the number of new jobs.
+    """
+    return get_connector(name)(conn, incremental).crawl(tap)
+
+
+def publish(name, conn):
+    """
+    Write one connector's outputs from the job store, see Connector.publish.
+    """
+    get_connector(name)(conn, incremental=False).publish()  # Not incremental: no crawl state is read
+
+
+def scheduled():
+    """
+    Names of the connectors run by the daily scheduler, in registration order.
+    """
+    return [name for name, cls in REGISTRY.items() if cls.scheduled]
+
+
+# --- Runner ---
+_DONE = object()
+
+
+def run(names=None, sinks=(), db=job_store.DB_FILE, incremental=True, max_workers=None):
+    """
+    Crawl the named connectors (default: all registered) in parallel.
+
+    Each connector runs in its own thread with its own job store connection (unless
+    `db` is None) and merges its records into the store as it goes (see Connector.crawl).
+    All records are also passed through a bounded queue to `sinks`, which are
+    written from the calling thread only and closed at the end.
+    Returns {connector name: {"records": n, "new": n, "error": exception or None}}.
+    """
+    names = list(names or REGISTRY)
+    classes = [get_connector(name) for name in names]
+    queue = Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+    results = {name: {"records": 0, "new": 0, "error": None} for name in names}
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return
+            except Full:
+                continue
+
+    def forward(records, result):
+        for record in records:
+            if stop.is_set():
+                break
+            put(record)
+            result["records"] += 1
+            yield record
+
+    def produce(cls):
+        result = results[cls.name]
+        conn = job_store.connect(db) if db else None
+        try:
+            connector = cls(conn, incremental)
+            with metrics.timer("crawl_seconds", log=True, source=cls.name):
+                result["new"] = connector.crawl(tap=lambda records: forward(records, result))
+        except Exception as e:
+            print(f"[ERROR] {cls.name} failed: {e!r}")
+            metrics.inc("crawl_errors_total", source=cls.name)
+            result["error"] = e
+        finally:
+            if conn is not None:
+                conn.close()
+            put(_DONE)
+
+    started = datetime.now()
+    print(f"[{started}] Running connectors: {', '.join(names)}")
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(classes), thread_name_prefix="connector")
+    try:
+        for cls in classes:
+            executor.submit(produce, cls)
+        running = len(classes)
+        while running:
+            try:
+                item = queue.get(timeout=1)
+            except Empty:
+                continue
+            if item is _DONE:
+                running -= 1
+                continue
+            for sink in sinks:
+                sink.write(item)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+        for sink in sinks:
+            sink.close()
+
+    for name, result in results.items():
+        outcome = f"failed: {result['error']!r}" if result["error"] else f"{result['new']} new"
+        print(f"[{datetime.now()}] {name}: {result['records']} records, {outcome}")
+    print(f"[{datetime.now()}] All connectors finished in {datetime.now() - started}.")
+    return results
+
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl job sources in parallel into one normalized schema.")
+    parser.add_argument("names", nargs="*", help=f"Connectors to run (default: all of {sorted(REGISTRY)})")
+    parser.add_argument("--db", default=job_store.DB_FILE, help="Job store to merge into")
+    parser.add_argument("--no-store", action="store_true", help="Do not merge into the job store")
+    parser.add_argument("--full", action="store_true", help="Ignore the stored state and crawl everything")
+    parser.add_argument("--csv", default=OUTPUT_FILE, help="CSV file receiving the records of all sources")
+    parser.add_argument("--no-merge", action="store_true",
+                        help="Write every record instead of merging duplicates across sources")
+    args = parser.parse_args()
+
+    if args.no_merge:
+        sink = pipeline.CsvSink(args.csv, NORMALIZED_FIELDS)
+    else:
+        sink = dedup.MergeSink(pipeline.CsvSink(args.csv, MERGED_FIELDS))
+    results = run(
+        args.names,
+        sinks=[sink],
+        db=None if args.no_store else args.db,
+        incremental=not args.full,
+    )
+    metrics.export(run="connectors")
+    if any(result["error"] for result in results.values()):
+        exit(1)
@@ -0,0 +1,195 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import metrics
+
+# Crawl planning for the JobTech search API, which pages no further than offset 2000.
+# The scope (municipalities x occupation fields x keywords) is cut into shards; a shard
+# whose reported total exceeds what the API can page through is split, first by
+# municipality, then by keyword group, then by publication date, until every shard
+# fits. All probes and page fetches share one worker pool, so the whole crawl stays
+# within one concurrency budget however many shards there are. Shards overlap (an ad
+# can match several keyword groups), so hits are deduplicated by ad id. A page that
+# still fails after PAGE_RETRIES is recorded in `Planner.failed`, so the caller knows
+# the crawl is incomplete.
+
+# --- Configuration ---
+PAGE_LIMIT = 100  # Maximum page size accepted by the search API
+MAX_RESULTS = 2000 + PAGE_LIMIT  # Hits reachable through offset paging
+CONCURRENCY = 8  # Requests in flight for the whole crawl
+PAGE_RETRIES = 2  # Times a failed page is queued again before it is given up
+OLDEST_AD_DAYS = 365  # Lower bound assumed when splitting an open date range
+
+# Municipality codes of Västra Götaland
+VASTRA_GOTALAND = {
+    "1401": "Härryda", "1402": "Partille", "1407": "Öckerö", "1415": "Stenungsund",
+    "1419": "Tjörn", "1421": "Orust", "1427": "Sotenäs", "1430": "Munkedal",
+    "1435": "Tanum", "1438": "Dals-Ed", "1439": "Färgelanda", "1440": "Ale",
+    "1441": "Lerum", "1442": "Vårgårda", "1443": "Bollebygd", "1444": "Grästorp",
+    "1445": "Essunga", "1446": "Karlsborg", "1447": "Gullspång", "1452": "Tranemo",
+    "1460": "Bengtsfors", "1461": "Mellerud", "1462": "Lilla Edet", "1463": "Mark",
+    "1465": "Svenljunga", "1466": "Herrljunga", "1470": "Vara", "1471": "Götene",
+    "1472": "Tibro", "1473": "Töreboda", "1480": "Göteborg", "1481": "Mölndal",
+    "1482": "Kungälv", "1484": "Lysekil", "1485": "Uddevalla", "1486": "Strömstad",
+    "1487": "Vänersborg", "1488": "Trollhättan", "1489": "Alingsås", "1490": "Borås",
+    "1491": "Ulricehamn", "1492": "Åmål", "1493": "Mariestad", "1494": "Lidköping",
+    "1495": "Skara", "1496": "Skövde", "1497": "Hjo", "1498": "Tidaholm",
+    "1499": "Falköping",
+}
+
+
+class Shard:
+    """
+    One slice of the crawl: municipalities, an occupation field, keywords and an
+    optional publication date range (YYYY-MM-DD, after inclusive, before exclusive).
+    """
+
+    __slots__ = ("municipalities", "occupation_field", "keywords", "published_after", "published_before")
+
+    def __init__(self, municipalities, occupation_field, keywords, published_after=None, published_before=None):
+        self.municipalities = tuple(municipalities)
+        self.occupation_field = occupation_field
+        self.keywords = tuple(keywords)
+        self.published_after = published_after
+        self.published_before = published_before
+
+    def __repr__(self):
+        places = self.municipalities[0] if len(self.municipalities) == 1 else f"{len(self.municipalities)} municipalities"
+        dates = f" {self.published_after or '...'}..{self.published_before or '...'}" \
+            if self.published_after or self.published_before else ""
+        return f"<Shard {places}, {self.occupation_field}, {len(self.keywords)} keywords{dates}>"
+
+    def _with(self, **changes):
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return Shard(**fields)
+
+    def split(self):
+        """
+        Return two shards covering this one, or [] if it cannot be split further.
+        """
+        if len(self.municipalities) > 1:
+            middle = len(self.municipalities) // 2
+            return [self._with(municipalities=self.municipalities[:middle]),
+                    self._with(municipalities=self.municipalities[middle:])]
+        if len(self.keywords) > 1:
+            middle = len(self.keywords) // 2
+            return [self._with(keywords=self.keywords[:middle]), self._with(keywords=self.keywords[middle:])]
+        today = date.today()
+        start = date.fromisoformat(self.published_after) if self.published_after \
+            else today - timedelta(days=OLDEST_AD_DAYS)
+        end = date.fromisoformat(self.published_before) if self.published_before else today + timedelta(days=1)
+        if (end - start).days < 2:
+            return []
+        middle = (start + (end - start) / 2).isoformat()
+        return [self._with(published_before=middle), self._with(published_after=middle)]
+
+
+def initial_shards(municipalities, occupation_fields, keywords, published_after=None):
+    """
+    One shard per occupation field over all municipalities and keywords; `Planner`
+    splits them further only where the API reports too many hits.
+    """
+    return [Shard(municipalities, field, keywords, published_after) for field in occupation_fields]
+
+
+def hit_key(hit):
+    return hit.get("id") or hit.get("webpage_url")
+
+
+class Planner:
+    """
+    Crawls shards through a shared pool of `concurrency` workers.
+
+    `fetch_page(query, municipality, occupation_field, offset, limit, published_after,
+    published_before)` returns the decoded search response or None, as
+    arbetsformedlingen.fetch_page does.
+    """
+
+    def __init__(self, fetch_page, concurrency=CONCURRENCY, page_limit=PAGE_LIMIT, max_results=MAX_RESULTS,
+                 page_retries=PAGE_RETRIES):
+        self.fetch_page = fetch_page
+        self.concurrency = max(1, concurrency)
+        self.page_limit = page_limit
+        self.max_results = max_results
+        self.page_retries = page_retries
+        self.shards = 0  # Shards fetched
+        self.splits = 0
+        self.duplicates = 0
+        self.failed = []  # (shard, offset) of the pages given up
+
+    def _fetch(self, shard, offset):
+        return self.fetch_page(
+            list(shard.keywords),
+            list(shard.municipalities),
+            shard.occupation_field,
+            offset,
+            limit=self.page_limit,
+            published_after=shard.published_after,
+            published_before=shard.published_before,
+        )
+
+    def pages(self, shards):
+        """
+        Yield the new (not yet seen) hits of every page of every shard, as pages arrive.
+
+        The first page of a shard doubles as its probe: if the reported total is more
+        than the API can page through the shard is split and its page dropped,
+        otherwise its remaining offsets are queued.
+        """
+        started = datetime.now()
+        queued = deque((shard, 0) for shard in shards)
+        in_flight = {}
+        attempts = {}  # (shard, offset) -> failed attempts
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="shard") as executor:
+            while queued or in_flight:
+                while queued and len(in_flight) < self.concurrency:
+                    shard, offset = queued.popleft()
+                    in_flight[executor.submit(self._fetch, shard, offset)] = (shard, offset)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard, offset = in_flight.pop(future)
+                    page = future.result()
+                    if page is None:
+                        failures = attempts[shard, offset] = attempts.get((shard, offset), 0) + 1
+                        if failures <= self.page_retries:
+                            metrics.inc("page_retries_total")
+                            queued.append((shard, offset))
+                        else:
+                            print(f"[ERROR] Missing results for {shard} at offset {offset}, giving up.")
+                            self.failed.append((shard, offset))
+                        continue
+                    if offset == 0:
+                        total = page.get("total", {}).get("value", 0)
+                        if total > self.max_results:
+                            children = shard.split()
+                            if children:
+                                self.splits += 1
+                                metrics.inc("shard_splits_total")
+                                # Probe the halves before the page fetches already queued
+                                queued.extendleft((child, 0) for child in reversed(children))
+                                continue
+                            print(f"[WARNING] {shard} reports {total} ads and cannot be split, "
+                                  f"only the first {self.max_results} are fetched.")
+                        self.shards += 1
+                        queued.extend((shard, next_offset) for next_offset
+                                      in range(self.page_limit, min(total, self.max_results), self.page_limit))
+                    hits = []
+                    for hit in page.get("hits", []):
+                        key = hit_key(hit)
+                        if key in seen:
+                            self.duplicates += 1
+                            continue
+                        seen.add(key)
+                        hits.append(hit)
+                    del page
+                    yield hits
+
+        metrics.set_gauge("shards", self.shards)
+        metrics.inc("duplicate_hits_total", self.duplicates)
+        metrics.inc("failed_pages_total", len(self.failed))
+        print(f"[{datetime.now()}] Crawled {self.shards} shards ({self.splits} splits): {len(seen)} ads, "
+              f"{self.duplicates} duplicates dropped, {len(self.failed)} pages missing, "
+              f"in {datetime.now() - started}.")
@@ -0,0 +1,233 @@
+import re
+import unicodedata
+from datetime import datetime
+from hashlib import blake2b
+
+import pipeline
+from classifier import normalize_name
+
+# Near-duplicate detection across sources. Titles are reduced to character shingles
+# and MinHash signatures; the signatures are cut into bands and every band is a key
+# in a blocking index, so a record is only compared with the few records it shares a
+# band with instead of with the whole archive (locality-sensitive hashing). Within a
+# band the index is split by employer, so common titles posted by many employers do
+# not pile up in one bucket.
+
+# --- Configuration ---
+SHINGLE_SIZE = 3  # Characters per title shingle
+NUM_HASHES = 64  # MinHash signature length
+BANDS = 16  # BANDS * ROWS == NUM_HASHES; candidates share a band above a similarity of about (1/BANDS) ** (1/ROWS)
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.7  # Minimum estimated title similarity for a match
+DATE_WINDOW = 30  # Days between postings that can still be the same vacancy
+UNKNOWN_EMPLOYER = "unknown employer"
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+# Fixed (a, b) pairs of the universal hash functions h(x) = (a * x + b) mod p
+_PERMUTATIONS = [
+    (int.from_bytes(blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_PRIME - 1) + 1,
+     int.from_bytes(blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _PRIME)
+    for i in range(NUM_HASHES)
+]
+
+
+# --- Signatures ---
+def normalize_title(title):
+    """
+    Lowercase a title, strip diacritics and punctuation and collapse whitespace.
+    """
+    title = unicodedata.normalize("NFKD", str(title).lower())
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[a-z0-9+#]+", title))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Set of 64-bit hashes of the character shingles of `text`.
+    """
+    if len(text) <= size:
+        grams = {text}
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return {int.from_bytes(blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big") for gram in grams}
+
+
+def minhash(hashes):
+    """
+    MinHash signature of a set of shingle hashes.
+    """
+    if not hashes:
+        return (_MASK,) * NUM_HASHES
+    return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(signature, other):
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    return sum(x == y for x, y in zip(signature, other)) / NUM_HASHES
+
+
+def bands(signature):
+    """
+    Blocking keys of a signature: one hash per band of ROWS values.
+    """
+    return [hash((band, signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+# --- Engine ---
+class Cluster:
+    """
+    Records judged to be the same vacancy. The first record supplies the fields.
+    """
+
+    __slots__ = ("record", "employer", "signature", "date", "sources", "links")
+
+    def __init__(self, record, employer, signature, date):
+        self.record = record
+        self.employer = employer
+        self.signature = signature
+        self.date = date
+        self.sources = []
+        self.links = []
+        self.add(record)
+
+    def add(self, record):
+        source = record.get("Source")
+        if source and source not in self.sources:
+            self.sources.append(source)
+        link = record.get("Job Link")
+        if link and link != "N/A" and link not in self.links:
+            self.links.append(link)
+
+    def merged(self):
+        """
+        The first record with "Sources" and "Links" listing every source and link.
+        """
+        return {**self.record, "Sources": ", ".join(self.sources), "Links": " ".join(self.links)}
+
+
+class Deduplicator:
+    """
+    Incrementally cluster job records into vacancies.
+
+    Two records match when their normalized employers agree (or one is unknown), they
+    were posted within DATE_WINDOW days of each other and their titles are at least
+    THRESHOLD similar. Exact repeats are caught by a dict lookup before any hashing.
+    """
+
+    def __init__(self, threshold=THRESHOLD, date_window=DATE_WINDOW):
+        self.threshold = threshold
+        self.date_window = date_window
+        self.clusters = []
+        self.exact = {}  # (employer, title) -> cluster
+        self.index = {}  # band key -> {employer: clusters}
+        self.comparisons = 0
+        self.count = 0
+
+    def _matches(self, cluster, employer, date):
+        if employer != cluster.employer and UNKNOWN_EMPLOYER not in (employer, cluster.employer):
+            return False
+        if date and cluster.date and abs((date - cluster.date).days) > self.date_window:
+            return False
+        return True
+
+    def _candidates(self, key, employer):
+        """
+        Clusters sharing band `key` whose employer can match `employer`: the same
+        employer or an unknown one, or any employer if `employer` is unknown.
+        """
+        buckets = self.index.get(key)
+        if not buckets:
+            return
+        if employer == UNKNOWN_EMPLOYER:
+            for clusters in buckets.values():
+                yield from clusters
+            return
+        yield from buckets.get(employer, ())
+        yield from buckets.get(UNKNOWN_EMPLOYER, ())
+
+    def add(self, record):
+        """
+        Add a record and return the cluster it joined or started.
+        """
+        employer = normalize_name(record.get("Employer") or "") or UNKNOWN_EMPLOYER
+        title = normalize_title(record.get("Title") or "")
+        date = parse_date(record.get("Date"))
+        self.count += 1
+
+        cluster = self.exact.get((employer, title))
+        if cluster is not None and self._matches(cluster, employer, date):
+            cluster.add(record)
+            return cluster
+
+        signature = minhash(shingles(title))
+        keys = bands(signature)
+        best, best_score = None, self.threshold
+        seen = set()
+        for key in keys:
+            for candidate in self._candidates(key, employer):
+                if id(candidate) in seen:
+                    continue
+                seen.add(id(candidate))
+                if not self._matches(candidate, employer, date):
+                    continue
+                self.comparisons += 1
+                score = similarity(signature, candidate.signature)
+                if score >= best_score:
+                    best, best_score = candidate, score
+
+        if best is None:
+            best = Cluster(record, employer, signature, date)
+            self.clusters.append(best)
+            for key in keys:
+                self.index.setdefault(key, {}).setdefault(employer, []).append(best)
+        else:
+            best.add(record)
+        self.exact.setdefault((employer, title), best)
+        return best
+
+    def merged(self):
+        """
+        Yield one merged record per cluster, in order of first appearance.
+        """
+        print(f"[{datetime.now()}] Merged {self.count} records into {len(self.clusters)} vacancies "
+              f"({self.comparisons} title comparisons).")
+        for cluster in self.clusters:
+            yield cluster.merged()
+
+
+def merge(records, **options):
+    """
+    Merge near-duplicate records across sources, see Deduplicator. Returns a list.
+    """
+    deduplicator = Deduplicator(**options)
+    for record in records:
+        deduplicator.add(record)
+    return list(deduplicator.merged())
+
+
+# --- Sink ---
+class MergeSink:
+    """
+    Sink that clusters incoming records and passes the merged records on to
+    `sinks` when closed.
+    """
+
+    def __init__(self, *sinks, **options):
+        self.sinks = sinks
+        self.deduplicator = Deduplicator(**options)
+
+    def write(self, record):
+        self.deduplicator.add(record)
+
+    def close(self):
+        pipeline.drain(self.deduplicator.merged(), *self.sinks)
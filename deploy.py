@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime
+from fnmatch import fnmatch
+from hashlib import sha256
+
+import metrics
+
+# Delta deployment of the generated site. Every file under public/ is hashed and
+# compared with the manifest of the last successful deploy to a target: nothing is
+# deployed when no file changed, otherwise the target receives the changed and
+# removed paths. FirebaseTarget deploys with the firebase CLI (which itself uploads
+# only files whose hash the hosting site does not have yet); LocalTarget mirrors the
+# site into a directory, for tests or a plain static web server.
+
+# --- Configuration ---
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_DIR = os.path.join(PROJECT_DIR, "public")
+FIREBASE_CONFIG = os.path.join(PROJECT_DIR, "firebase.json")
+MANIFEST_FILE = os.path.join(PROJECT_DIR, ".deploy_manifest.json")  # State of the last Firebase deploy
+LOCAL_MANIFEST = ".deploy_manifest.json"  # Kept inside a local target directory
+DEPLOY_LOG_FILE = os.path.join(PROJECT_DIR, "deploy_log.txt")  # Output of the last firebase deploy
+DEPLOY_TIMEOUT = 15 * 60  # Seconds
+FIREBASE = os.environ.get("FIREBASE_BIN", "firebase")
+DEFAULT_IGNORE = ["firebase.json", "**/.*", "**/node_modules/**"]
+CHUNK_SIZE = 1024 * 1024
+
+
+# --- Manifest ---
+def ignore_patterns(config=FIREBASE_CONFIG):
+    """
+    The hosting ignore globs of firebase.json, so the manifest covers exactly what Firebase serves.
+    """
+    try:
+        with open(config, encoding="utf-8") as file:
+            return json.load(file)["hosting"].get("ignore", DEFAULT_IGNORE)
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_IGNORE
+
+
+def is_ignored(path, patterns):
+    # "**/" also matches at the top level, as in Firebase's globs
+    return any(fnmatch(path, pattern) or fnmatch(path, pattern.removeprefix("**/")) for pattern in patterns)
+
+
+def file_hash(path):
+    digest = sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(site_dir=SITE_DIR, previous=None, patterns=None):
+    """
+    Return {relative path: {"hash", "size", "mtime"}} of every file in `site_dir`.
+
+    Files whose size and modification time match `previous` keep their recorded hash
+    without being read again; render.write_if_changed leaves unchanged pages untouched.
+    """
+    previous = previous or {}
+    patterns = ignore_patterns() if patterns is None else patterns
+    manifest = {}
+    for root, dirs, files in os.walk(site_dir):
+        dirs.sort()
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, site_dir).replace(os.sep, "/")
+            if is_ignored(path, patterns):
+                continue
+            stat = os.stat(full_path)
+            known = previous.get(path)
+            if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+                manifest[path] = known
+            else:
+                manifest[path] = {"hash": file_hash(full_path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+    return manifest
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def diff(previous, current):
+    """
+    Return (changed, removed) paths of `current` against `previous`.
+    """
+    changed = sorted(path for path, entry in current.items()
+                     if path not in previous or previous[path]["hash"] != entry["hash"])
+    removed = sorted(path for path in previous if path not in current)
+    return changed, removed
+
+
+# --- Targets ---
+class Target:
+    """
+    Where the site is deployed to. Subclasses implement `push`.
+    """
+
+    name = None
+    manifest_file = MANIFEST_FILE
+
+    def push(self, site_dir, changed, removed, manifest):
+        """
+        Bring the target up to date with `site_dir`, given the changed and removed paths.
+        Raises on failure; the manifest is then not saved and the next run retries.
+        """
+        raise NotImplementedError
+
+
+class LocalTarget(Target):
+    """
+    Mirror of the site in a local directory. Only changed files are copied.
+    """
+
+    name = "local"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, LOCAL_MANIFEST)
+
+    def push(self, site_dir, changed, removed, manifest):
+        os.makedirs(self.directory, exist_ok=True)
+        for path in changed:
+            destination = os.path.join(self.directory, *path.split("/"))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copy2(os.path.join(site_dir, *path.split("/")), destination)
+        for path in removed:
+            try:
+                os.remove(os.path.join(self.directory, *path.split("/")))
+            except FileNotFoundError:
+                pass
+
+
+class FirebaseTarget(Target):
+    """
+    Firebase Hosting, deployed with the firebase CLI. A hosting release always holds
+    the whole file list, but the CLI hashes every file and uploads only those the
+    site does not already have, so a run with few changes uploads little.
+    """
+
+    name = "firebase"
+
+    def __init__(self, firebase=FIREBASE, cwd=PROJECT_DIR, log_file=DEPLOY_LOG_FILE):
+        self.firebase = firebase
+        self.cwd = cwd
+        self.log_file = log_file
+
+    def push(self, site_dir, changed, removed, manifest):
+        firebase = shutil.which(self.firebase)
+        if not firebase:
+            raise RuntimeError(f"Firebase CLI '{self.firebase}' not found on PATH")
+        result = subprocess.run(
+            [firebase, "deploy", "--only", "hosting", "--non-interactive"],
+            cwd=self.cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=DEPLOY_TIMEOUT,
+        )
+        with open(self.log_file, "w", encoding="utf-8") as deploy_log:
+            deploy_log.write(f"--- stdout ---\n{result.stdout}\n--- stderr ---\n{result.stderr}\n")
+        if result.returncode != 0:
+            raise RuntimeError(f"firebase deploy exited with status {result.returncode}, output in {self.log_file}")
+
+
+# --- Functions ---
+def deploy(target, site_dir=SITE_DIR, force=False):
+    """
+    Deploy the changes in `site_dir` since the last deploy to `target`.
+
+    Returns (changed, removed) paths; both are empty when the deploy was skipped.
+    """
+    previous = load_manifest(target.manifest_file)
+    with metrics.timer("deploy_hash_seconds"):
+        manifest = build_manifest(site_dir, previous)
+    changed, removed = diff({} if force else previous, manifest)
+    if not changed and not removed:
+        print(f"[{datetime.now()}] {target.name}: no changes in {len(manifest)} files, deploy skipped.")
+        metrics.inc("deploys_total", target=target.name, result="skipped")
+        return [], []
+
+    size = sum(manifest[path]["size"] for path in changed)
+    print(f"[{datetime.now()}] {target.name}: deploying {len(changed)} changed files ({size / 1024:.0f} KiB), "
+          f"{len(removed)} removed.")
+    with metrics.timer("deploy_seconds", log=True, target=target.name):
+        target.push(site_dir, changed, removed, manifest)
+    save_manifest(manifest, target.manifest_file)
+    metrics.inc("deploys_total", target=target.name, result="deployed")
+    metrics.inc("deploy_files_total", len(changed), target=target.name)
+    metrics.inc("deploy_bytes_total", size, target=target.name)
+    return changed, removed
+
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deploy the files of public/ that changed since the last deploy.")
+    parser.add_argument("--to", metavar="DIR", help="Mirror into a local directory instead of Firebase")
+    parser.add_argument("--site", default=SITE_DIR, help="Directory of the generated site")
+    parser.add_argument("--force", action="store_true", help="Deploy even if no file changed")
+    args = parser.parse_args()
+
+    deploy(LocalTarget(args.to) if args.to else FirebaseTarget(), args.site, force=args.force)
+    metrics.export(run="deploy")
@@ -1,6 +1,8 @@
 @echo off
 echo %DATE% %TIME% - Firebase Deploy Started >> firebase_log.txt
 cd C:\Users\Mahsa\Desktop\NewFolder\projects\python\Job_Search_Data
-C:\Users\Mahsa\AppData\Roaming\npm\firebase.cmd deploy >> firebase_log.txt 2>&1
+set FIREBASE_BIN=C:\Users\Mahsa\AppData\Roaming\npm\firebase.cmd
+rem Deploys only when files in public\ changed since the last deploy, see deploy.py
+python deploy.py >> firebase_log.txt 2>&1
 echo %DATE% %TIME% - Firebase Deploy Finished >> firebase_log.txt
 exit
@@ -0,0 +1,157 @@
+from functools import lru_cache
+from importlib.util import find_spec
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional
+    LexborHTMLParser = None
+
+# BeautifulSoup is imported on first use only: with selectolax installed it is never needed
+BS4_PARSER = "lxml" if find_spec("lxml") else "html.parser"  # lxml is optional
+
+# --- Configuration ---
+# Extraction backend: "selectolax" when installed, otherwise BeautifulSoup with BS4_PARSER
+DEFAULT_BACKEND = "selectolax" if LexborHTMLParser else "bs4"
+
+VAKANSER_DATE_STYLE = "float: right; color: green;"
+
+# Only these subtrees are built when parsing with BeautifulSoup, as (tag, class)
+VAKANSER_STRAINER = ("section", "section")
+PLATSBANKEN_STRAINER = ("div", "job-card")
+LISTING_STRAINER = ("div", "job-listing")
+
+# --- Helpers ---
+@lru_cache(maxsize=None)
+def _strainer(tag, class_):
+    from bs4 import SoupStrainer
+    return SoupStrainer(tag, class_=class_)
+
+def _soup(html_content, strainer, parser=None):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, parser or BS4_PARSER, parse_only=_strainer(*strainer))
+
+def _lexbor(html_content):
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", "replace")
+    return LexborHTMLParser(html_content)
+
+def _lexbor_next_anchor(node):
+    """
+    selectolax equivalent of BeautifulSoup's `find_next("a")`: the first <a> after the
+    start of `node` in document order, including its own descendants.
+    """
+    found = node.css_first("a")
+    if found:
+        return found
+    while node is not None:
+        sibling = node.next
+        while sibling is not None:
+            if sibling.tag == "a":
+                return sibling
+            if sibling.tag != "-text":
+                found = sibling.css_first("a")
+                if found:
+                    return found
+            sibling = sibling.next
+        node = node.parent
+    return None
+
+def _lexbor_next_text(node):
+    """
+    selectolax equivalent of BeautifulSoup's `find_next_sibling(string=True)`.
+    """
+    sibling = node.next
+    while sibling is not None:
+        if sibling.tag == "-text":
+            return sibling.text_content
+        sibling = sibling.next
+    return None
+
+# --- Extractors ---
+def extract_vakanser(html_content, backend=None, parser=None):
+    """
+    Extract raw job entries from a vakanser.se result page.
+    Returns a list of (date_and_employer_text, title, href) tuples; missing parts are None.
+    """
+    if (backend or DEFAULT_BACKEND) == "selectolax":
+        entries = []
+        for section in _lexbor(html_content).css("section.section"):
+            for span in section.css(f'span[style="{VAKANSER_DATE_STYLE}"]'):
+                title_tag = _lexbor_next_anchor(span)
+                entries.append((
+                    _lexbor_next_text(span),
+                    title_tag.text() if title_tag else None,
+                    title_tag.attributes.get("href") if title_tag else None,
+                ))
+        return entries
+
+    entries = []
+    for section in _soup(html_content, VAKANSER_STRAINER, parser).find_all("section", class_="section"):
+        for span in section.find_all("span", style=VAKANSER_DATE_STYLE):
+            title_tag = span.find_next("a")
+            entries.append((
+                span.find_next_sibling(string=True),
+                title_tag.text if title_tag else None,
+                title_tag.get("href") if title_tag else None,
+            ))
+    return entries
+
+def extract_platsbanken(html_content, backend=None, parser=None):
+    """
+    Extract raw job cards from a Platsbanken result page.
+    Returns a list of dicts with title, employer, date and href; missing parts are None.
+    """
+    cards = []
+    if (backend or DEFAULT_BACKEND) == "selectolax":
+        for card in _lexbor(html_content).css("div.job-card"):
+            title_tag = card.css_first("h3.job-card-title")
+            employer_tag = card.css_first("span.job-card-company")
+            date_tag = card.css_first("time.job-card-date")
+            link_tag = card.css_first("a[href]")
+            cards.append({
+                "title": title_tag.text() if title_tag else None,
+                "employer": employer_tag.text() if employer_tag else None,
+                "date": date_tag.attributes.get("datetime") if date_tag else None,
+                "href": link_tag.attributes.get("href") if link_tag else None,
+            })
+        return cards
+
+    for card in _soup(html_content, PLATSBANKEN_STRAINER, parser).find_all("div", class_="job-card"):
+        title_tag = card.find("h3", class_="job-card-title")
+        employer_tag = card.find("span", class_="job-card-company")
+        date_tag = card.find("time", class_="job-card-date")
+        link_tag = card.find("a", href=True)
+        cards.append({
+            "title": title_tag.text if title_tag else None,
+            "employer": employer_tag.text if employer_tag else None,
+            "date": date_tag.get("datetime") if date_tag else None,
+            "href": link_tag["href"] if link_tag else None,
+        })
+    return cards
+
+def extract_listings(html_content, backend=None, parser=None):
+    """
+    Extract (title, href, date) tuples from `div.job-listing` entries.
+    """
+    if (backend or DEFAULT_BACKEND) == "selectolax":
+        listings = []
+        for listing in _lexbor(html_content).css("div.job-listing"):
+            link_tag = listing.css_first("a")
+            date_tag = listing.css_first("span.date")
+            listings.append((
+                link_tag.text() if link_tag else None,
+                link_tag.attributes.get("href") if link_tag else None,
+                date_tag.text() if date_tag else None,
+            ))
+        return listings
+
+    listings = []
+    for listing in _soup(html_content, LISTING_STRAINER, parser).find_all("div", class_="job-listing"):
+        link_tag = listing.find("a")
+        date_tag = listing.find("span", class_="date")
+        listings.append((
+            link_tag.text if link_tag else None,
+            link_tag.get("href") if link_tag else None,
+            date_tag.text if date_tag else None,
+        ))
+    return listings
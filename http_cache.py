@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from hashlib import sha256
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# On-disk cache of HTTP responses used by http_client.get. Bodies are stored once per
+# content hash under <directory>/bodies, and an SQLite index maps request keys (URL,
+# params and request headers) to a body and the validators needed for revalidation.
+
+# --- Configuration ---
+CACHE_DIR = ".http_cache"
+MAX_SIZE = 512 * 1024 * 1024  # Bytes of bodies kept before the least recently used are evicted
+CACHE_STATUSES = {200, 404}  # 404 ends the vakanser crawl, so replays need it too
+# Stored for replay, but never served as fresh: a page missing today (e.g. past the
+# last vakanser page) may exist on the next run, so these are always refetched
+REFETCHED_STATUSES = {404}
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Date")
+
+# Modes
+OFF = "off"  # No caching
+ON = "on"  # Serve fresh entries, revalidate stale ones
+REFRESH = "refresh"  # Always go to the network (conditionally), store the result
+REPLAY = "replay"  # Serve only from the cache, never touch the network
+MODES = (OFF, ON, REFRESH, REPLAY)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE INDEX IF NOT EXISTS responses_body ON responses (body);
+"""
+
+
+class CacheMiss(requests.RequestException):
+    """
+    Raised in replay mode for a request that was never recorded.
+    """
+
+
+def request_key(url, params=None, headers=None):
+    """
+    Stable key of a GET request.
+    """
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    header_lines = sorted(f"{k.lower()}:{v}" for k, v in (headers or {}).items())
+    return sha256("\n".join([url, query, *header_lines]).encode("utf-8")).hexdigest()
+
+
+class Entry:
+    """
+    A cached response and its metadata.
+    """
+
+    __slots__ = ("key", "url", "status", "headers", "body", "stored_at")
+
+    def __init__(self, key, url, status, headers, body, stored_at):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    def age(self):
+        return time.time() - self.stored_at
+
+    def validators(self):
+        """
+        Conditional request headers for revalidating this entry.
+        """
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded response cache with LRU eviction.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_size=MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.body_dir = os.path.join(directory, "bodies")
+        os.makedirs(self.body_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.total = self.size()
+
+    def _body_file(self, digest):
+        return os.path.join(self.body_dir, digest[:2], digest)
+
+    def get(self, key):
+        """
+        Return the Entry stored for a key, or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, status, headers, digest, stored_at = row
+            try:
+                with open(self._body_file(digest), "rb") as file:
+                    body = file.read()
+            except OSError:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return Entry(key, url, status, CaseInsensitiveDict(json.loads(headers)), body, stored_at)
+
+    def put(self, key, response):
+        """
+        Store a response under a key.
+        """
+        body = response.content
+        digest = sha256(body).hexdigest()
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        path = self._body_file(digest)
+        with self.lock:
+            if not self.conn.execute("SELECT 1 FROM responses WHERE body = ?", (digest,)).fetchone():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temporary = f"{path}.{threading.get_ident()}.tmp"
+                with open(temporary, "wb") as file:
+                    file.write(body)
+                os.replace(temporary, path)
+                self.total += len(body)
+            previous = self.conn.execute("SELECT body, size FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, stored_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, json.dumps(headers), digest, len(body), now, now),
+            )
+            if previous and previous[0] != digest:
+                self._release(*previous)
+            if self.total > self.max_size:
+                self._evict()
+
+    def touch(self, key):
+        """
+        Mark an entry as fresh again after a 304 Not Modified.
+        """
+        with self.lock:
+            now = time.time()
+            self.conn.execute("UPDATE responses SET stored_at = ?, last_used = ? WHERE key = ?", (now, now, key))
+
+    def size(self):
+        """
+        Bytes of distinct bodies referenced by the index.
+        """
+        row = self.conn.execute("SELECT SUM(size) FROM (SELECT MAX(size) AS size FROM responses GROUP BY body)")
+        return row.fetchone()[0] or 0
+
+    def _release(self, digest, size):
+        """
+        Delete a body that no entry refers to any more.
+        """
+        if not self.conn.execute("SELECT 1 FROM responses WHERE body = ?", (digest,)).fetchone():
+            try:
+                os.remove(self._body_file(digest))
+            except OSError:
+                pass
+            self.total -= size
+
+    def _evict(self):
+        """
+        Drop the least recently used entries until the bodies fit in max_size.
+        """
+        rows = self.conn.execute("SELECT key, body, size FROM responses ORDER BY last_used").fetchall()
+        removed = 0
+        for key, digest, size in rows:
+            if self.total <= self.max_size:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._release(digest, size)
+            removed += 1
+        print(f"[{datetime.now()}] Evicted {removed} cached responses, {self.total / 1024 / 1024:.1f} MiB left.")
+
+    def clear(self):
+        with self.lock:
+            for (digest,) in self.conn.execute("SELECT DISTINCT body FROM responses").fetchall():
+                try:
+                    os.remove(self._body_file(digest))
+                except OSError:
+                    pass
+            self.conn.execute("DELETE FROM responses")
+            self.total = 0
+
+
+def to_response(entry):
+    """
+    Build a requests.Response from a cache entry; `from_cache` is set on it.
+    """
+    response = requests.Response()
+    response.status_code = entry.status
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response._content = entry.body
+    response.url = entry.url
+    response.reason = "OK" if entry.status == 200 else ""
+    response.from_cache = True
+    return response
+
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the HTTP response cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--dir", default=os.environ.get("HTTP_CACHE_DIR", CACHE_DIR))
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.dir)
+    if args.command == "clear":
+        cache.clear()
+    count = cache.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    print(f"{count} cached responses, {cache.size() / 1024 / 1024:.1f} MiB in {args.dir}")
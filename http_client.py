@@ -0,0 +1,235 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+import metrics
+
+# --- Configuration ---
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 1.0  # Seconds before the first retry, doubled on every attempt
+BACKOFF_MAX = 60.0
+POOL_SIZE = 16  # Keep-alive connections kept open per host
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Job_Search_Data/1.0 (+https://github.com/MahsaAbbasian/Job_Search_Data)"
+
+# Requests per second and burst size allowed per host
+HOST_RATE_LIMITS = {
+    "jobsearch.api.jobtechdev.se": (10.0, 10),
+    "arbetsformedlingen.se": (2.0, 4),
+    "vakanser.se": (1.0, 2),
+}
+DEFAULT_RATE_LIMIT = (5.0, 5)
+
+# Response cache, see http_cache. Off by default, so a scheduled crawl never serves a stale
+# listing page; set HTTP_CACHE=on|refresh|replay for development and benchmarks
+CACHE_MODE = os.environ.get("HTTP_CACHE", http_cache.OFF)
+CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", http_cache.CACHE_DIR)
+# Seconds a cached response is served without revalidation, per host
+HOST_CACHE_TTLS = {
+    "jobsearch.api.jobtechdev.se": 15 * 60,
+    "jobstream.api.jobtechdev.se": 0,  # The stream is always revalidated
+}
+DEFAULT_CACHE_TTL = 60 * 60
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; `acquire` blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_session = None
+_session_lock = threading.Lock()
+_buckets = {}
+_buckets_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide pooled session, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+def _bucket_for(url):
+    host = urlsplit(url).hostname or ""
+    with _buckets_lock:
+        if host not in _buckets:
+            rate, capacity = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            _buckets[host] = TokenBucket(rate, capacity)
+        return _buckets[host]
+
+
+def configure_cache(mode=None, directory=None):
+    """
+    Change the cache mode and/or directory for the rest of the process.
+    """
+    global CACHE_MODE, CACHE_DIR, _cache
+    if mode is not None and mode not in http_cache.MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}, expected one of {http_cache.MODES}")
+    with _cache_lock:
+        CACHE_MODE = mode or CACHE_MODE
+        if directory is not None and directory != CACHE_DIR:
+            CACHE_DIR = directory
+            _cache = None
+
+
+def get_cache():
+    """
+    Return the process-wide response cache, or None if caching is off.
+    """
+    global _cache
+    if CACHE_MODE == http_cache.OFF:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = http_cache.ResponseCache(CACHE_DIR)
+        return _cache
+
+
+def _retry_after(response):
+    """
+    Parse a Retry-After header (seconds or HTTP date) into seconds, or None.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _backoff(attempt):
+    """
+    Full-jitter exponential backoff for the given (1-based) attempt.
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    GET a URL through the response cache, see `fetch` for the network side.
+
+    Cached responses younger than the host's TTL are served as they are; older ones
+    are revalidated with If-None-Match/If-Modified-Since and refreshed on 304.
+    Responses with a status in http_cache.REFETCHED_STATUSES are always fetched
+    again; only replay serves them from the cache. In replay mode nothing goes to
+    the network and an unrecorded request raises http_cache.CacheMiss (a
+    requests.RequestException). Cached responses have `from_cache` set.
+    """
+    cache = get_cache()
+    if cache is None:
+        return fetch(url, params, headers, timeout, retries)
+
+    host = urlsplit(url).hostname or ""
+    key = http_cache.request_key(url, params, headers)
+    entry = cache.get(key)
+    if CACHE_MODE == http_cache.REPLAY:
+        if entry is None:
+            metrics.inc("http_cache_total", host=host, result="replay_miss")
+            raise http_cache.CacheMiss(f"{url} {params or ''} is not in the cache")
+        metrics.inc("http_cache_total", host=host, result="hit")
+        return http_cache.to_response(entry)
+    ttl = HOST_CACHE_TTLS.get(host, DEFAULT_CACHE_TTL)
+    if entry is not None and entry.status in http_cache.REFETCHED_STATUSES:
+        entry = None  # Kept for replay only, fetched again from scratch
+    if entry is not None and CACHE_MODE == http_cache.ON and entry.age() < ttl:
+        metrics.inc("http_cache_total", host=host, result="hit")
+        return http_cache.to_response(entry)
+
+    conditional = dict(headers or {})
+    if entry is not None:
+        conditional.update(entry.validators())
+    response = fetch(url, params, conditional, timeout, retries)
+    if response.status_code == 304 and entry is not None:
+        metrics.inc("http_cache_total", host=host, result="revalidated")
+        cache.touch(key)
+        return http_cache.to_response(entry)
+    metrics.inc("http_cache_total", host=host, result="miss")
+    if response.status_code in http_cache.CACHE_STATUSES:
+        cache.put(key, response)
+    return response
+
+
+def fetch(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    GET a URL through the shared session with per-host rate limiting, bypassing the cache.
+
+    429 and 5xx responses and network errors are retried with jittered exponential
+    backoff, honouring Retry-After when the server sends it. Returns the last response;
+    raises requests.RequestException if every attempt failed without a response.
+    """
+    session = get_session()
+    bucket = _bucket_for(url)
+    host = urlsplit(url).hostname or ""
+    for attempt in range(1, retries + 1):
+        if attempt > 1:
+            metrics.inc("http_retries_total", host=host)
+        bucket.acquire()
+        started = time.perf_counter()
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            metrics.inc("http_errors_total", host=host, error=type(e).__name__)
+            if attempt == retries:
+                raise
+            delay = _backoff(attempt)
+            print(f"[{datetime.now()}] {url} failed ({e}), retrying in {delay:.1f}s ({attempt}/{retries})")
+        else:
+            metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+            metrics.inc("http_requests_total", host=host, status=response.status_code)
+            metrics.inc("http_response_bytes_total", len(response.content), host=host)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = _retry_after(response)
+            if delay is None:
+                delay = _backoff(attempt)
+            delay = min(delay, BACKOFF_MAX)
+            print(f"[{datetime.now()}] {url} returned {response.status_code}, "
+                  f"retrying in {delay:.1f}s ({attempt}/{retries})")
+        time.sleep(delay)
@@ -0,0 +1,489 @@
+import argparse
+import re
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit, unquote
+
+import metrics
+from records import Job
+
+# --- Configuration ---
+DB_FILE = "jobs.sqlite"
+BATCH_SIZE = 500  # Jobs buffered per write transaction, so crawls never hold the write lock while fetching
+LOCK_TIMEOUT = 60  # Seconds to wait for another writer (e.g. a concurrent crawl) to commit
+SEARCH_LIMIT = 50
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)  # bm25 weights of title, employer and description matches
+MISSING_LINKS = {"", "N/A"}  # Job Link values of ads without a link
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    source TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    title TEXT,
+    employer TEXT,
+    category TEXT,
+    date TEXT,
+    job_link TEXT,
+    description TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    first_run INTEGER,
+    last_run INTEGER,
+    removed_at TEXT,
+    PRIMARY KEY (source, job_key)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT PRIMARY KEY,
+    last_published TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    seen INTEGER,
+    new INTEGER
+);
+"""
+
+# Created after migrations so they can refer to columns added by them
+INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_source_date ON jobs (source, date);
+CREATE INDEX IF NOT EXISTS jobs_first_seen ON jobs (first_seen, source, employer);
+CREATE INDEX IF NOT EXISTS jobs_employer ON jobs (employer, first_seen);
+CREATE INDEX IF NOT EXISTS jobs_category ON jobs (category, first_seen);
+CREATE INDEX IF NOT EXISTS jobs_first_run ON jobs (first_run);  -- New ads of a run, folded by analytics.refresh
+"""
+
+# Columns added after the first version of the schema
+MIGRATIONS = {
+    "first_run": "ALTER TABLE jobs ADD COLUMN first_run INTEGER",
+    "last_run": "ALTER TABLE jobs ADD COLUMN last_run INTEGER",
+    "removed_at": "ALTER TABLE jobs ADD COLUMN removed_at TEXT",
+    "description": "ALTER TABLE jobs ADD COLUMN description TEXT",
+}
+
+# Full-text index over the jobs table, kept in sync by triggers. Known ads are
+# refreshed on every run, so the update trigger only fires when indexed text changed.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, employer, description,
+    content='jobs', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 2 tokenchars '+#'"
+);
+CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, title, employer, description)
+    VALUES (new.rowid, new.title, new.employer, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, employer, description)
+    VALUES ('delete', old.rowid, old.title, old.employer, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, employer, description ON jobs
+WHEN old.title IS NOT new.title OR old.employer IS NOT new.employer OR old.description IS NOT new.description
+BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, employer, description)
+    VALUES ('delete', old.rowid, old.title, old.employer, old.description);
+    INSERT INTO jobs_fts (rowid, title, employer, description)
+    VALUES (new.rowid, new.title, new.employer, new.description);
+END;
+"""
+
+# Column name in the job dicts -> column in the jobs table
+FIELDS = {
+    "Title": "title",
+    "Employer": "employer",
+    "Category": "category",
+    "Date": "date",
+    "Job Link": "job_link",
+}
+
+# Extra columns included by iter_jobs(..., history=True)
+HISTORY_FIELDS = {
+    "Source": "source",
+    "First Seen": "first_seen",
+    "Last Seen": "last_seen",
+    "Removed At": "removed_at",
+}
+
+
+def connect(path=DB_FILE):
+    """
+    Open (and create if needed) the job store.
+    """
+    conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")  # Readers do not block the writer and vice versa
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+    with conn:
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+    conn.executescript(INDEXES)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone():
+        try:
+            conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"[{datetime.now()}] Full-text search unavailable: {e}")
+        else:
+            reindex(conn)  # Index the ads stored before the search index existed
+    return conn
+
+
+def reindex(conn):
+    """
+    Rebuild the full-text index from the jobs table.
+    """
+    with conn:
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
+def job_key(job):
+    """
+    Store key of a job: its normalized link or, for an ad without one, its title,
+    employer and date, so ads without links do not all collapse into one row.
+    """
+    link = (job.get("Job Link") or "").strip()
+    if link.upper() not in MISSING_LINKS:
+        return normalize_link(link)
+    fields = (" ".join(str(job.get(field) or "").lower().split()) for field in ("Title", "Employer", "Date"))
+    return "nolink:" + "|".join(fields)
+
+
+def normalize_link(link):
+    """
+    Normalize a job link so the same ad always maps to the same key:
+    lowercase scheme/host, no query string or fragment, no trailing slash.
+    """
+    parts = urlsplit(link.strip())
+    path = unquote(parts.path).rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+def known_links(conn, source, include_removed=False):
+    """
+    Return the set of normalized links already stored for a source.
+    """
+    query = "SELECT job_key FROM jobs WHERE source = ?"
+    if not include_removed:
+        query += " AND removed_at IS NULL"
+    rows = conn.execute(query, (source,))
+    return {row[0] for row in rows}
+
+
+def _write_batch(conn, source, batch, now, run_id):
+    """
+    Upsert a batch of jobs in one transaction. Returns the number of new ads.
+    """
+    new_count = 0
+    with conn:
+        for job in batch:
+            key = job_key(job)
+            values = [job.get(field) for field in FIELDS]
+            description = job.get("Description") or None
+            known = conn.execute(
+                "SELECT 1 FROM jobs WHERE source = ? AND job_key = ?", (source, key)
+            ).fetchone()
+            if known:
+                conn.execute(
+                    "UPDATE jobs SET title = ?, employer = ?, category = ?, date = ?, job_link = ?, "
+                    "description = COALESCE(?, description), last_seen = ?, last_run = ?, removed_at = NULL "
+                    "WHERE source = ? AND job_key = ?",
+                    (*values, description, now, run_id, source, key),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (source, job_key, title, employer, category, date, job_link, "
+                    "description, first_seen, last_seen, first_run, last_run) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (source, key, *values, description, now, now, run_id, run_id),
+                )
+                new_count += 1
+    return new_count
+
+
+def merge_jobs(conn, source, jobs, complete=None):
+    """
+    Merge jobs (any iterable, consumed once) into the store as one recorded run.
+    New ads are inserted, known ads get their fields, last_seen and last_run
+    refreshed (and are revived if they had been removed). Jobs are written in
+    batches of BATCH_SIZE. Returns the number of new ads.
+
+    The source's watermark moves up to the newest publication date merged, unless
+    `complete` (called once `jobs` is exhausted) returns False: a crawl that lost
+    pages leaves it unchanged, so the next incremental run covers the range again.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+    before = conn.total_changes
+    total = new_count = 0
+    categories = Counter()
+    last_published = None
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (source, started_at) VALUES (?, ?)", (source, now)
+        ).lastrowid
+
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        total += 1
+        categories[job.get("Category") or "Uncategorized"] += 1
+        date = job.get("Date") or ""
+        if date[:1].isdigit() and (last_published is None or date > last_published):
+            last_published = date
+        if len(batch) >= BATCH_SIZE:
+            new_count += _write_batch(conn, source, batch, now, run_id)
+            batch = []
+    new_count += _write_batch(conn, source, batch, now, run_id)
+
+    if last_published and complete is not None and not complete():
+        print(f"[{datetime.now()}] {source} crawl incomplete, watermark left at {get_watermark(conn, source)}.")
+        metrics.inc("incomplete_runs_total", source=source)
+        last_published = None
+    with conn:
+        if last_published:
+            conn.execute(
+                "INSERT INTO watermarks (source, last_published) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET last_published = MAX(last_published, excluded.last_published)",
+                (source, last_published),
+            )
+        conn.execute(
+            "UPDATE runs SET finished_at = ?, seen = ?, new = ? WHERE run_id = ?",
+            (datetime.now().isoformat(timespec="seconds"), total, new_count, run_id),
+        )
+    for category, count in categories.items():
+        metrics.inc("records_total", count, source=source, category=category)
+    metrics.inc("new_records_total", new_count, source=source)
+    metrics.set_gauge("run_records", total, source=source)
+    metrics.event("merge", source=source, run_id=run_id, seen=total, new=new_count,
+                  seconds=round(time.perf_counter() - started, 3))
+    print(f"[{datetime.now()}] Merged {total} jobs into {source} store "
+          f"({new_count} new, {conn.total_changes - before} rows written).")
+    return new_count
+
+
+def remove_jobs(conn, source, links):
+    """
+    Mark ads as removed by job link. They stay in the store as history but are no
+    longer listed by iter_jobs. Returns the number of ads marked.
+    """
+    return remove_keys(conn, source, (normalize_link(link) for link in links))
+
+
+def remove_keys(conn, source, keys):
+    """
+    Mark ads as removed by job key (see job_key and known_links), as remove_jobs.
+    Returns the number of ads marked.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    before = conn.total_changes
+    with conn:
+        conn.executemany(
+            "UPDATE jobs SET removed_at = ? WHERE source = ? AND job_key = ? AND removed_at IS NULL",
+            ((now, source, key) for key in keys),
+        )
+    return conn.total_changes - before
+
+
+def set_watermark(conn, source, value):
+    """
+    Overwrite the watermark stored for a source.
+    """
+    with conn:
+        conn.execute(
+            "INSERT INTO watermarks (source, last_published) VALUES (?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET last_published = excluded.last_published",
+            (source, value),
+        )
+
+
+def get_watermark(conn, source):
+    """
+    Return the latest publication date seen for a source, or None.
+    """
+    row = conn.execute("SELECT last_published FROM watermarks WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else None
+
+
+def iter_jobs(conn, source=None, history=False, include_removed=False):
+    """
+    Yield stored jobs (of one source, or all) as Job records, newest first, straight
+    from the cursor. With `history` they are dicts that also hold the source and
+    first/last seen columns.
+    """
+    fields = {**FIELDS, **HISTORY_FIELDS} if history else FIELDS
+    conditions, params = [], []
+    if source is not None:
+        conditions.append("source = ?")
+        params.append(source)
+    if not include_removed:
+        conditions.append("removed_at IS NULL")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = conn.execute(
+        f"SELECT {', '.join(fields.values())} FROM jobs {where} ORDER BY date DESC, first_seen DESC", params
+    )
+    if history:
+        for row in rows:
+            yield {field: value for field, value in zip(fields, row) if value is not None}
+    else:
+        for title, employer, category, date, link in rows:  # In the order of FIELDS
+            yield Job(title, employer, date, link, category)
+
+
+def load_jobs(conn, source):
+    """
+    Return all stored jobs for a source as Job records, newest first.
+    """
+    return list(iter_jobs(conn, source))
+
+
+def new_ads_per_week(conn, since=None, source=None):
+    """
+    Return (week, source, employer, count) rows of ads first seen per ISO-ish week
+    (%Y-%W), served from the first_seen index.
+    """
+    conditions, params = [], []
+    if since:
+        conditions.append("first_seen >= ?")
+        params.append(since)
+    if source:
+        conditions.append("source = ?")
+        params.append(source)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return conn.execute(
+        f"SELECT strftime('%Y-%W', first_seen) AS week, source, employer, COUNT(*) FROM jobs {where} "
+        "GROUP BY week, source, employer ORDER BY week, source, employer",
+        params,
+    ).fetchall()
+
+
+def build_query(text):
+    """
+    Turn a search box query into an FTS5 expression. Words and "quoted phrases" are
+    matched literally (so C++ or .NET need no escaping), a trailing * makes a prefix
+    query and AND, OR and NOT are kept as operators; words are implicitly ANDed.
+    """
+    parts = []
+    for token in re.findall(r'"[^"]*"\*?|\S+', text):
+        if token in ("AND", "OR", "NOT"):
+            if parts and parts[-1] not in ("AND", "OR", "NOT"):
+                parts.append(token)
+            continue
+        prefix = token.endswith("*")
+        phrase = token.rstrip("*").strip('"').replace('"', '""')
+        if phrase:
+            parts.append(f'"{phrase}"' + ("*" if prefix else ""))
+    while parts and parts[-1] in ("AND", "OR", "NOT"):
+        parts.pop()
+    return " ".join(parts)
+
+
+def search(conn, query, category=None, since=None, source=None, limit=SEARCH_LIMIT, include_removed=False):
+    """
+    Ranked full-text search over titles, employers and descriptions (see build_query),
+    optionally filtered by category, source and publication date (`since`, YYYY-MM-DD).
+    Returns job dicts, best match first, with the source and a snippet of the match.
+    """
+    expression = build_query(query)
+    if not expression:
+        return []
+    conditions, params = ["jobs_fts MATCH ?"], [expression]
+    if category:
+        conditions.append("jobs.category = ? COLLATE NOCASE")
+        params.append(category)
+    if since:
+        conditions.append("jobs.date >= ?")
+        params.append(since)
+    if source:
+        conditions.append("jobs.source = ?")
+        params.append(source)
+    if not include_removed:
+        conditions.append("jobs.removed_at IS NULL")
+    fields = {**FIELDS, "Source": "source"}
+    weights = ", ".join(map(str, SEARCH_WEIGHTS))
+    rows = conn.execute(
+        f"SELECT {', '.join(f'jobs.{column}' for column in fields.values())}, "
+        "snippet(jobs_fts, -1, '[', ']', '...', 12) "
+        f"FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid WHERE {' AND '.join(conditions)} "
+        f"ORDER BY bm25(jobs_fts, {weights}) LIMIT ?",
+        (*params, limit),
+    )
+    results = []
+    for *values, snippet in rows:
+        job = {field: value for field, value in zip(fields, values) if value is not None}
+        job["Snippet"] = snippet
+        results.append(job)
+    return results
+
+
+def export_csv(conn, filename, source=None, history=True):
+    """
+    Export stored jobs as a CSV view, including history columns by default.
+    """
+    import pipeline
+
+    fields = [*FIELDS, *HISTORY_FIELDS] if history else list(FIELDS)
+    return pipeline.drain(iter_jobs(conn, source, history=history, include_removed=history),
+                          pipeline.CsvSink(filename, fields))
+
+
+def export_parquet(conn, directory, source=None):
+    """
+    Export stored jobs as a Parquet dataset partitioned by source and first-seen month.
+    Needs pandas with pyarrow installed.
+    """
+    import pandas as pd
+
+    fields = {**FIELDS, **HISTORY_FIELDS}
+    frame = pd.DataFrame(iter_jobs(conn, source, history=True, include_removed=True),
+                         columns=list(fields)).rename(columns=fields)
+    frame["first_seen_month"] = frame["first_seen"].str[:7]
+    frame.to_parquet(directory, partition_cols=["source", "first_seen_month"], index=False,
+                     existing_data_behavior="delete_matching")
+    print(f"[{datetime.now()}] Exported {len(frame)} jobs to {directory}.")
+    return len(frame)
+
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and search views of the job store.")
+    parser.add_argument("--db", default=DB_FILE, help="Job store database file")
+    parser.add_argument("--source", help="Only export this source")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    csv_parser = subcommands.add_parser("csv", help="Export a CSV view")
+    csv_parser.add_argument("filename")
+    csv_parser.add_argument("--current", action="store_true", help="Only listed ads, without history columns")
+    parquet_parser = subcommands.add_parser("parquet", help="Export a partitioned Parquet dataset")
+    parquet_parser.add_argument("directory")
+    weekly_parser = subcommands.add_parser("weekly", help="Print new ads per employer per week")
+    weekly_parser.add_argument("--since", help="Only weeks from this date (YYYY-MM-DD)")
+    search_parser = subcommands.add_parser("search", help="Full-text search of the stored ads")
+    search_parser.add_argument("query", nargs="+", help='Words, "phrases", prefix* and AND/OR/NOT')
+    search_parser.add_argument("--category", help="e.g. Non-Consultancy")
+    search_parser.add_argument("--days", type=int, help="Only ads published in the last N days")
+    search_parser.add_argument("--since", help="Only ads published from this date (YYYY-MM-DD)")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    subcommands.add_parser("reindex", help="Rebuild the full-text search index")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "csv":
+        export_csv(conn, args.filename, args.source, history=not args.current)
+    elif args.command == "parquet":
+        export_parquet(conn, args.directory, args.source)
+    elif args.command == "search":
+        since = args.since
+        if args.days is not None:
+            since = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+        for job in search(conn, " ".join(args.query), args.category, since, args.source, args.limit):
+            print(f"{job.get('Date')}\t{job.get('Category')}\t{job.get('Title')}\t{job.get('Employer')}\t"
+                  f"{job.get('Job Link')}\n\t{job['Snippet']}")
+    elif args.command == "reindex":
+        reindex(conn)
+    else:
+        for week, source, employer, count in new_ads_per_week(conn, args.since, args.source):
+            print(f"{week}\t{source}\t{employer}\t{count}")
+    conn.close()
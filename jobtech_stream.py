@@ -0,0 +1,151 @@
+import argparse
+import http.server
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+
+import http_client
+import job_store
+import metrics
+from arbetsformedlingen import MUNICIPALITIES, OCCUPATION_FIELDS, SOURCE, process_jobs, publish
+
+# --- Configuration ---
+STREAM_API_URL = "https://jobstream.api.jobtechdev.se"
+HEADERS = {"accept": "application/json"}
+STREAM_WATERMARK = f"{SOURCE}-stream"  # Key of the last sync time in the job store's watermarks
+AD_URL = "https://arbetsformedlingen.se/platsbanken/annonser/{}"
+REQUEST_TIMEOUT = (5, 300)  # The snapshot is large, allow a long read
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"  # Timestamps as the API writes and reads them, in UTC
+
+# --- Functions ---
+def fetch_endpoint(base_url, endpoint, params=None):
+    """
+    Fetch a list of ads from the snapshot or stream endpoint.
+    """
+    url = f"{base_url.rstrip('/')}/{endpoint}"
+    print(f"[{datetime.now()}] Fetching {url} {params or ''}...")
+    try:
+        response = http_client.get(url, headers=HEADERS, params=params, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"[ERROR] Unable to fetch {endpoint}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"[ERROR] Unable to fetch {endpoint}. Status Code: {response.status_code}")
+        return None
+    ads = response.json()
+    print(f"[{datetime.now()}] Received {len(ads)} ads from {endpoint}.")
+    return ads
+
+def fetch_snapshot(base_url=STREAM_API_URL):
+    """
+    Fetch every currently published ad.
+    """
+    return fetch_endpoint(base_url, "snapshot")
+
+def fetch_stream(since, base_url=STREAM_API_URL):
+    """
+    Fetch ads added, changed or removed since `since` (UTC, TIME_FORMAT).
+    """
+    return fetch_endpoint(base_url, "stream", {"date": since})
+
+def ad_link(ad):
+    """
+    Return the ad's Platsbanken link; removed ads in the stream only carry their id.
+    """
+    return ad.get("webpage_url") or AD_URL.format(ad["id"])
+
+def matches(ad, municipalities=MUNICIPALITIES, occupation_fields=OCCUPATION_FIELDS):
+    """
+    Apply the municipality and occupation field filters that /search does server-side.
+    """
+    address = ad.get("workplace_address") or {}
+    field = ad.get("occupation_field") or {}
+    return (address.get("municipality_code") in municipalities
+            and (field.get("concept_id") in occupation_fields
+                 or field.get("legacy_ams_taxonomy_id") in occupation_fields))
+
+def apply_changes(conn, ads, full_snapshot=False):
+    """
+    Apply a batch of ads to the job store. Removed ads are marked removed, matching ads
+    are merged. For a full snapshot, stored ads missing from it are marked removed as expired.
+    Returns (added, updated, removed) counts.
+    """
+    current = [ad for ad in ads if not ad.get("removed") and matches(ad)]
+    # Ads that moved out of our municipality or field are removed as well
+    gone = [ad for ad in ads if ad.get("removed") or not matches(ad)]
+    jobs = process_jobs(current) if current else []
+    # Keys as the job store has them (see job_store.job_key), not links: not every stored key is a link
+    removed_keys = [job_store.normalize_link(ad_link(ad)) for ad in gone]
+
+    if full_snapshot:
+        current_keys = {job_store.job_key(job) for job in jobs}
+        removed_keys += [key for key in job_store.known_links(conn, SOURCE) if key not in current_keys]
+
+    removed = job_store.remove_keys(conn, SOURCE, removed_keys)
+    added = job_store.merge_jobs(conn, SOURCE, jobs) if jobs else 0
+    return added, len(current) - added, removed
+
+def sync(conn, base_url=STREAM_API_URL):
+    """
+    Bring the job store up to date: a full snapshot on the first run, then only the
+    stream of changes since the previous sync. Returns True if the store changed.
+    """
+    started = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+    since = job_store.get_watermark(conn, STREAM_WATERMARK)
+    if since:
+        ads = fetch_stream(since, base_url)
+    else:
+        ads = fetch_snapshot(base_url)
+    if ads is None:
+        return False
+
+    added, updated, removed = apply_changes(conn, ads, full_snapshot=not since)
+    job_store.set_watermark(conn, STREAM_WATERMARK, started)
+    print(f"[{datetime.now()}] Applied {len(ads)} changes: {added} new, {updated} updated, {removed} removed.")
+    return bool(added or updated or removed)
+
+def serve_fixtures(fixture_dir, port=8765):
+    """
+    Serve recorded `snapshot.json` / `stream.json` files as a local stand-in for the
+    stream API, so `sync` can be run against http://localhost:<port>.
+    """
+    class FixtureHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            endpoint = urlsplit(self.path).path.strip("/")
+            path = os.path.join(fixture_dir, f"{endpoint}.json")
+            if endpoint not in ("snapshot", "stream") or not os.path.exists(path):
+                self.send_error(404)
+                return
+            with open(path, "rb") as file:
+                body = file.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    print(f"[{datetime.now()}] Serving {fixture_dir} on http://127.0.0.1:{server.server_port}")
+    return server
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the job store from the JobTech stream API.")
+    parser.add_argument("--base-url", default=STREAM_API_URL, help="Stream API base URL")
+    parser.add_argument("--db", default=job_store.DB_FILE, help="Job store database file")
+    parser.add_argument("--serve", metavar="FIXTURE_DIR", help="Replay recorded JSON instead of syncing")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_fixtures(args.serve, args.port).serve_forever()
+    else:
+        conn = job_store.connect(args.db)
+        if sync(conn, args.base_url):
+            publish(conn)  # The same outputs as arbetsformedlingen.py, which owns them
+        else:
+            print(f"[{datetime.now()}] No changes, outputs left unchanged.")
+        conn.close()
+        metrics.export(run=SOURCE)
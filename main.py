@@ -1,20 +1,24 @@
 import requests
-import pandas as pd
-import os
 from datetime import datetime
-from bs4 import BeautifulSoup
+from arbetsformedlingen import MUNICIPALITY_CODE, OCCUPATION_FIELD, iter_pages
+import html_parsing
+import http_client
+import pipeline
+import render
+from records import Job
 
 # --- Constants ---
-ARBETSFORMEDLINGEN_OUTPUT_HTML = "public/arbetsformedlingen.html"
-VAKANSER_OUTPUT_HTML = "public/vakanser.html"
+# Pages of their own: public/arbetsformedlingen.html and public/vakanser.html belong to the source scrapers
+ARBETSFORMEDLINGEN_OUTPUT_HTML = "public/main-arbetsformedlingen.html"
+VAKANSER_OUTPUT_HTML = "public/main-vakanser.html"
 ARBETSFORMEDLINGEN_OUTPUT_CSV = "filtered_jobs_arbetsformedlingen.csv"
 VAKANSER_OUTPUT_CSV = "filtered_jobs_vakanser.csv"
 SEARCH_QUERY = "Software Developer"
-MUNICIPALITY_CODE = "1480"  # Göteborg
-OCCUPATION_FIELD = "apaJ_2ja_LuF"
 
-HEADERS = {"accept": "application/json"}
-ARBETSFORMEDLINGEN_API_URL = "https://jobsearch.api.jobtechdev.se/search"
+HTML_COLUMNS = ["Title", "Publication Date", "Job Link"]
+ARBETSFORMEDLINGEN_CSV_COLUMNS = ["Title", "Job Link", "Publication Date"]
+VAKANSER_CSV_COLUMNS = ["Title", "Job Link", "Publication Date", "Source"]
+
 VAKANSER_URL = "https://vakanser.se/alla/datajobb/i/goteborg/2/"
 
 # --- Helper Functions ---
@@ -24,94 +28,54 @@ def sanitize_text(text):
 
 # --- Arbetsförmedlingen Fetch ---
 def fetch_arbetsformedlingen_jobs(query, municipality, occupation_field):
+    """Yield jobs from Arbetsförmedlingen page by page, releasing each page's raw hits."""
     print(f"[{datetime.now()}] Fetching jobs from Arbetsförmedlingen...")
-    all_jobs = []
-    offset = 0
-    limit = 50
-
-    while True:
-        params = {
-            "q": query,
-            "municipality": municipality,
-            "occupation-field": occupation_field,
-            "limit": limit,
-            "offset": offset
-        }
-        response = requests.get(ARBETSFORMEDLINGEN_API_URL, headers=HEADERS, params=params)
-
-        if response.status_code != 200:
-            print(f"Error: Unable to fetch data. Status Code {response.status_code}")
-            break
-
-        jobs = response.json().get("hits", [])
-        if not jobs:
-            break
-
-        all_jobs.extend(jobs)
-        offset += limit
-
-    print(f"Fetched {len(all_jobs)} jobs from Arbetsförmedlingen.")
-    return all_jobs
+    for hits in iter_pages(query, municipality, occupation_field):
+        for job in hits:
+            yield Job(job.get("headline", "N/A"), date=job.get("publication_date", "N/A"), link=job.get("webpage_url", "#"))
 
 # --- Vakanser Fetch ---
 def fetch_vakanser_jobs():
     print(f"[{datetime.now()}] Fetching jobs from Vakanser...")
-    response = requests.get(VAKANSER_URL)
+    try:
+        response = http_client.get(VAKANSER_URL)
+    except requests.RequestException as e:
+        print(f"Error: Unable to fetch data. {e}")
+        return []
 
     if response.status_code != 200:
         print(f"Error: Unable to fetch data. Status Code {response.status_code}")
         return []
 
-    soup = BeautifulSoup(response.content, "html.parser")
     job_list = []
 
-    for job in soup.find_all("div", class_="job-listing"):
-        title = job.find("a").text.strip()
-        link = job.find("a")["href"]
-        date = job.find("span", class_="date").text.strip()
-        job_list.append({
-            "Title": title,
-            "Job Link": link,
-            "Publication Date": date,
-            "Source": "Vakanser"
-        })
+    for title, link, date in html_parsing.extract_listings(response.content):
+        title = sanitize_text(title.strip()) if title is not None else "N/A"
+        link = link or "#"
+        date = date.strip() if date is not None else "N/A"
+        job_list.append(Job(title, date=date, link=link, source="Vakanser"))
 
     print(f"Fetched {len(job_list)} jobs from Vakanser.")
     return job_list
 
 # --- Save Functions ---
-def save_to_csv(jobs, filename):
+def save_to_csv(jobs, filename, columns=VAKANSER_CSV_COLUMNS):
     print(f"[{datetime.now()}] Saving jobs to {filename}...")
-    pd.DataFrame(jobs).to_csv(filename, index=False)
-    print(f"Saved {len(jobs)} jobs to {filename}.")
+    return pipeline.drain(jobs, pipeline.CsvSink(filename, columns))
 
 def save_to_html(jobs, filename):
     print(f"[{datetime.now()}] Saving jobs to HTML file: {filename}")
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write("<html><head><title>Job Listings</title></head><body>")
-        file.write("<h1>Job Listings</h1><table border='1'><tr>")
-        file.write("<th>Title</th><th>Publication Date</th><th>Job Link</th></tr>")
-
-        for job in jobs:
-            file.write("<tr>")
-            file.write(f"<td>{sanitize_text(job['Title'])}</td>")
-            file.write(f"<td>{job['Publication Date']}</td>")
-            file.write(f"<td><a href='{job['Job Link']}' target='_blank'>View Job</a></td>")
-            file.write("</tr>")
-
-        file.write("</table></body></html>")
-    print(f"Saved HTML file: {filename}")
+    return pipeline.drain(jobs, render.SiteSink(filename, HTML_COLUMNS, group_field=None, title="Job Listings"))
 
 # --- Main Function ---
 def main():
     # Arbetsförmedlingen Jobs
     arbetsformedlingen_jobs = fetch_arbetsformedlingen_jobs(SEARCH_QUERY, MUNICIPALITY_CODE, OCCUPATION_FIELD)
-    categorized_arbetsformedlingen_jobs = [
-        {"Title": job.get("headline", "N/A"), "Job Link": job.get("webpage_url", "#"), "Publication Date": job.get("publication_date", "N/A")}
-        for job in arbetsformedlingen_jobs
-    ]
-    save_to_csv(categorized_arbetsformedlingen_jobs, ARBETSFORMEDLINGEN_OUTPUT_CSV)
-    save_to_html(categorized_arbetsformedlingen_jobs, ARBETSFORMEDLINGEN_OUTPUT_HTML)
+    pipeline.drain(
+        arbetsformedlingen_jobs,
+        pipeline.CsvSink(ARBETSFORMEDLINGEN_OUTPUT_CSV, ARBETSFORMEDLINGEN_CSV_COLUMNS),
+        render.SiteSink(ARBETSFORMEDLINGEN_OUTPUT_HTML, HTML_COLUMNS, group_field=None, title="Job Listings"),
+    )
 
     # Vakanser Jobs
     vakanser_jobs = fetch_vakanser_jobs()
@@ -0,0 +1,213 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Counters, gauges and timings recorded by the scrapers, keyed by metric name and
+# labels (source, host, stage, ...). Stage events are written as JSON lines through a
+# queue, so the crawl threads never wait for the disk, and `export` writes the totals
+# of a run as one JSON line plus a Prometheus textfile (for node_exporter's textfile
+# collector). Alert on e.g. jobsearch_run_records == 0 for a source or on
+# jobsearch_task_seconds_sum growing.
+
+# --- Configuration ---
+EVENTS_FILE = os.environ.get("METRICS_EVENTS_FILE", "metrics.jsonl")  # Set to "" (before the first event) to disable
+PROMETHEUS_FILE = os.environ.get("METRICS_PROMETHEUS_FILE", "metrics.prom")
+PREFIX = "jobsearch_"
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_gauges = {}
+_timings = {}  # (name, labels) -> [count, sum, max]
+_listeners = []
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# --- Recording ---
+def inc(name, value=1, **labels):
+    """
+    Add `value` to a counter.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name, seconds, **labels):
+    """
+    Record one duration of a timing.
+    """
+    key = _key(name, labels)
+    with _lock:
+        timing = _timings.get(key)
+        if timing is None:
+            _timings[key] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+
+@contextmanager
+def timer(name, log=False, **labels):
+    """
+    Time the body of a `with` block into timing `name`; with `log` also write an event.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe(name, elapsed, **labels)
+        if log:
+            event(name, seconds=round(elapsed, 6), **labels)
+
+
+def timed(name, **labels):
+    """
+    Decorator timing every call of a function into timing `name`.
+    """
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- Events ---
+def buffered_logger(name, filename, fmt="%(message)s", datefmt=None):
+    """
+    Return a logger whose records are queued and written to `filename` by a background
+    thread. Queued records are flushed at interpreter exit.
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(filename, encoding="utf-8", delay=True)
+        file_handler.setFormatter(logging.Formatter(fmt, datefmt))
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+        _listeners.append(listener)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def event(name, **fields):
+    """
+    Write one JSON line event.
+    """
+    if not EVENTS_FILE:
+        return
+    record = {"time": datetime.now().isoformat(timespec="milliseconds"), "event": name, **fields}
+    buffered_logger("metrics.events", EVENTS_FILE).info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+@atexit.register
+def flush():
+    """
+    Stop the background writers, writing out everything still queued.
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+# --- Export ---
+def snapshot():
+    """
+    Return the current values as {"counters": [...], "gauges": [...], "timings": [...]}.
+    """
+    with _lock:
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(_counters.items())],
+            "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                       for (name, labels), value in sorted(_gauges.items())],
+            "timings": [{"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                         "max": round(maximum, 6)}
+                        for (name, labels), (count, total, maximum) in sorted(_timings.items())],
+        }
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def prometheus_text(values=None):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+    """
+    values = values or snapshot()
+    lines, typed = [], set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for counter in values["counters"]:
+        name = PREFIX + counter["name"]
+        declare(name, "counter")
+        lines.append(f"{name}{_labels(counter['labels'])} {counter['value']}")
+    for gauge in values["gauges"]:
+        name = PREFIX + gauge["name"]
+        declare(name, "gauge")
+        lines.append(f"{name}{_labels(gauge['labels'])} {gauge['value']}")
+    for timing in values["timings"]:
+        name = PREFIX + timing["name"]
+        declare(name, "summary")
+        labels = _labels(timing["labels"])
+        lines.append(f"{name}_count{labels} {timing['count']}")
+        lines.append(f"{name}_sum{labels} {timing['sum']}")
+    return "\n".join(lines) + "\n"
+
+
+def export(run=None):
+    """
+    Write the run totals as a JSON line event and to the Prometheus textfile
+    (atomically, so a scrape never sees half a file).
+    """
+    set_gauge("last_export_timestamp_seconds", int(time.time()))
+    values = snapshot()
+    event("run", run=run, **values)
+    if PROMETHEUS_FILE:
+        temporary = f"{PROMETHEUS_FILE}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(prometheus_text(values))
+        os.replace(temporary, PROMETHEUS_FILE)
+    return values
+
+
+def reset():
+    """
+    Forget all recorded values, e.g. between scheduled runs.
+    """
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
@@ -0,0 +1,231 @@
+import csv
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from hashlib import blake2b
+
+import metrics
+from classifier import DEFAULT_CLASSIFIER
+
+# Records flow through these stages one at a time:
+#   fetch -> parse -> dedupe -> classify -> sink
+# Every stage is a generator, so at most one page of records is held in memory.
+# For numbered HTML pages `crawl_pages` runs fetch and parse as separate stages: pages
+# are fetched by threads and parsed by worker processes, a bounded window ahead. The
+# parser processes are shared and outlive a crawl (see get_parse_pool).
+
+# --- Configuration ---
+FETCH_WORKERS = 4  # Pages fetched concurrently (http_client's per-host rate limit still applies)
+PARSE_WORKERS = min(4, os.cpu_count() or 1)  # Parser processes; 0 parses in the fetch threads
+
+_parse_pools = {}  # Number of workers -> ProcessPoolExecutor, kept warm across crawls
+_parse_pools_lock = threading.Lock()
+
+# --- Stages ---
+def record_key(record, fields):
+    """
+    Compact 64-bit key of the given fields, used for deduplication.
+    """
+    digest = blake2b(digest_size=8)
+    for field in fields:
+        digest.update(str(record.get(field, "")).encode("utf-8"))
+        digest.update(b"\x1f")
+    return int.from_bytes(digest.digest(), "big")
+
+def dedupe(records, fields=("Title", "Employer"), key=None):
+    """
+    Drop records whose fields (or `key(record)`, if given) repeat an earlier record's,
+    keeping the first one.
+    """
+    seen = set()
+    for record in records:
+        key_value = key(record) if key is not None else record_key(record, fields)
+        if key_value not in seen:
+            seen.add(key_value)
+            yield record
+
+def classify(records, default="Uncategorized"):
+    """
+    Add a Category to records that do not have one yet.
+    """
+    for record in records:
+        if "Category" not in record:
+            record["Category"] = DEFAULT_CLASSIFIER.classify(record.get("Employer", "")) or default
+        yield record
+
+def count_by(records, field, counter):
+    """
+    Pass records through unchanged while counting the values of `field` into `counter`.
+    """
+    for record in records:
+        counter[record.get(field)] += 1
+        yield record
+
+def _import_modules(names):
+    for name in names:
+        importlib.import_module(name)
+
+def get_parse_pool(workers=PARSE_WORKERS, preload=()):
+    """
+    Return the process-wide pool of `workers` parser processes, starting it on first use
+    with the modules named in `preload` imported in every worker.
+
+    The workers live as long as the process, so a long-running scheduler pays for
+    spawning them and importing the scrapers once, not on every crawl.
+    """
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            # Spawned (not forked) workers: crawls run beside other threads, and Windows can only spawn
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_import_modules, initargs=(tuple(preload),))
+            _parse_pools[workers] = pool
+        return pool
+
+def warm_up(*modules, workers=PARSE_WORKERS):
+    """
+    Start all parser processes now, each importing `modules`, instead of on the first crawl.
+    """
+    if not workers:
+        return
+    pool = get_parse_pool(workers, preload=modules)
+    # Workers are started on submit while none is idle, so this starts all of them
+    for future in [pool.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+
+def _timed_parse(parse, content):
+    # Runs in a parser process: its own metrics never reach the parent, so the time is returned
+    started = time.perf_counter()
+    return parse(content), time.perf_counter() - started
+
+def crawl_pages(fetch, parse, start_page=1, max_empty_pages=3, should_stop=None,
+                fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS, source=None, end_page=None,
+                failures=None):
+    """
+    Yield the parsed records of numbered pages, page by page and in page order.
+
+    `fetch(page_number)` returns the raw page or None; `parse(content)` returns a list
+    of records, or None to stop the crawl (e.g. at the target date). `parse` must be a
+    module-level function, as it is sent to the parser processes.
+
+    Pages are fetched up to `fetch_workers` at a time and handed to a process pool of
+    `parse_workers` parsers as soon as they arrive, so fetching and parsing overlap.
+    Results are consumed in page order however they complete, so the stop rules are
+    those of a sequential crawl: stop after `max_empty_pages` missing or empty pages in
+    a row (never, if None), when `parse` returns None, or when `should_stop(records)` is true for a
+    non-empty page. Speculative pages beyond the stop are cancelled or dropped.
+    With `end_page` no page after it is fetched. The numbers of consumed pages that
+    could not be fetched are appended to the `failures` list, if given.
+    """
+    fetch_workers = max(1, fetch_workers)
+    window = fetch_workers + max(1, parse_workers)  # Pages fetched or parsed but not yet consumed
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch")
+    parse_pool = get_parse_pool(parse_workers) if parse_workers else None
+    in_flight = deque()  # [page number, fetch future, parse future], in page order
+    next_page = start_page
+    empty_pages = 0
+    try:
+        while True:
+            while len(in_flight) < window and (end_page is None or next_page <= end_page):
+                in_flight.append([next_page, fetch_pool.submit(fetch, next_page), None])
+                next_page += 1
+            if not in_flight:
+                break
+
+            # Hand every fetched page to the parsers
+            for entry in in_flight:
+                fetched = entry[1]
+                if entry[2] is None and fetched.done() and fetched.result():
+                    entry[2] = parse_pool.submit(_timed_parse, parse, fetched.result()) if parse_pool \
+                        else fetch_pool.submit(parse, fetched.result())
+
+            page_number, fetched, parsed = in_flight[0]
+            if not fetched.done() or (parsed is not None and not parsed.done()):
+                pending = [future for entry in in_flight for future in entry[1:]
+                           if future is not None and not future.done()]
+                wait(pending, return_when=FIRST_COMPLETED)
+                continue
+            in_flight.popleft()
+
+            if parsed is None:  # Fetch failed or page missing
+                empty_pages += 1
+                if failures is not None:
+                    failures.append(page_number)
+            else:
+                records = parsed.result()
+                if parse_pool:
+                    records, seconds = records
+                    metrics.observe("parse_seconds", seconds, **({"source": source} if source else {}))
+                if records is None:
+                    break
+                empty_pages = 0 if records else empty_pages + 1
+                if records:
+                    yield records
+                    if should_stop is not None and should_stop(records):
+                        print(f"Page {page_number} ends the crawl.")
+                        break
+            if max_empty_pages is not None and empty_pages >= max_empty_pages:
+                break
+    except BrokenProcessPool:
+        with _parse_pools_lock:
+            _parse_pools.pop(parse_workers, None)  # Started afresh by the next crawl
+        raise
+    finally:
+        for _, fetched, parsed in in_flight:
+            fetched.cancel()
+            if parsed is not None:
+                parsed.cancel()  # The shared parser pool stays up
+        fetch_pool.shutdown(wait=True, cancel_futures=True)
+
+# --- Sinks ---
+class CsvSink:
+    """
+    Write records to a CSV file as they arrive. Columns default to the first record's keys.
+    """
+
+    def __init__(self, filename, fieldnames=None):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def write(self, record):
+        if self.writer is None:
+            self.file = open(self.filename, "w", encoding="utf-8", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames or list(record),
+                                         extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(record)
+        self.count += 1
+
+    def close(self):
+        if self.file is None:
+            # Nothing arrived: still leave a valid (header-only) file behind
+            with open(self.filename, "w", encoding="utf-8", newline="") as file:
+                if self.fieldnames:
+                    csv.writer(file).writerow(self.fieldnames)
+        else:
+            self.file.close()
+        print(f"[{datetime.now()}] Saved {self.count} jobs to {self.filename}.")
+
+def drain(records, *sinks):
+    """
+    Feed every record to all sinks, then close them. Returns the number of records.
+    """
+    count = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
@@ -0,0 +1,213 @@
+/*
+ * Client-side search over the JSON index written by search_index.SearchIndexSink.
+ *
+ * The index (field dictionaries and shard lists) is fetched after the page has
+ * loaded. The term shard of a query word is fetched when the word is typed, the
+ * category and employer postings when a filter is set, and month shards only for
+ * the rows that are actually shown. Without an active filter the static listing
+ * of the page is left as it is.
+ */
+(function () {
+    "use strict";
+
+    var PAGE_SIZE = 100;
+    var MIN_TERM_LENGTH = 2;
+
+    var script = document.currentScript;
+    var indexUrl = script.getAttribute("data-index");
+    var baseUrl = indexUrl.slice(0, indexUrl.lastIndexOf("/") + 1);
+    var form, listing, results;
+    var index = null;
+    var shards = {};  // File -> promise of its JSON
+    var decoded = {};
+    var generation = 0;  // Results of superseded queries are dropped
+
+    function tokenize(text) {
+        // Same normalization as dedup.normalize_title / search_index.tokens
+        var matches = text.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").toLowerCase().match(/[a-z0-9+#]+/g);
+        return (matches || []).filter(function (token) { return token.length >= MIN_TERM_LENGTH; });
+    }
+
+    function decode(key, deltas) {
+        if (!decoded[key]) {
+            var ids = new Array(deltas.length);
+            var previous = 0;
+            for (var i = 0; i < deltas.length; i++) {
+                previous += deltas[i];
+                ids[i] = previous;
+            }
+            decoded[key] = ids;
+        }
+        return decoded[key];
+    }
+
+    function intersect(a, b) {
+        // Both sorted ascending
+        var out = [];
+        for (var i = 0, j = 0; i < a.length && j < b.length;) {
+            if (a[i] < b[j]) { i++; } else if (a[i] > b[j]) { j++; } else { out.push(a[i]); i++; j++; }
+        }
+        return out;
+    }
+
+    function load(file) {
+        if (!shards[file]) {
+            shards[file] = fetch(baseUrl + file).then(function (response) { return response.json(); });
+        }
+        return shards[file];
+    }
+
+    function termShard(token) {
+        // Same keys as search_index.term_shard
+        var first = token.charAt(0);
+        return /[a-z0-9]/.test(first) ? first : "_";
+    }
+
+    function termPostings(token) {
+        // Prefix match, so results show up while a word is still being typed
+        var key = termShard(token);
+        if (index.termShards.indexOf(key) < 0) {
+            return Promise.resolve([]);
+        }
+        return load("terms-" + key + ".json").then(function (terms) {
+            var seen = {};
+            var ids = [];
+            Object.keys(terms).forEach(function (term) {
+                if (term.lastIndexOf(token, 0) === 0) {
+                    decode("t:" + term, terms[term]).forEach(function (id) {
+                        if (!seen[id]) { seen[id] = true; ids.push(id); }
+                    });
+                }
+            });
+            return ids.sort(function (a, b) { return a - b; });
+        });
+    }
+
+    function filterPostings(field, key, position) {
+        return load("filters.json").then(function (filters) { return decode(key, filters[field][position]); });
+    }
+
+    function matchingDocuments() {
+        // Promise of the matching document numbers, or null without an active filter
+        var sets = tokenize(form.q.value).map(termPostings);
+        var category = form.category.value;
+        if (category !== "") {
+            sets.push(filterPostings("byCategory", "c:" + category, +category));
+        }
+        var employer = form.employer.value.trim();
+        if (employer) {
+            var position = index.employers.indexOf(employer);
+            sets.push(position < 0 ? Promise.resolve([]) : filterPostings("byEmployer", "e:" + position, position));
+        }
+        if (!sets.length) {
+            return null;
+        }
+        return Promise.all(sets).then(function (lists) { return lists.reduce(intersect); });
+    }
+
+    function shardOf(id) {
+        for (var i = 0; i < index.shards.length; i++) {
+            var shard = index.shards[i];
+            if (id >= shard.offset && id < shard.offset + shard.count) {
+                return shard;
+            }
+        }
+        return null;
+    }
+
+    function cell(row, text) {
+        var td = document.createElement("td");
+        td.textContent = text;
+        row.appendChild(td);
+        return td;
+    }
+
+    function render(ids, total, current) {
+        return Promise.all(ids.map(function (id) {
+            var shard = shardOf(id);
+            return load(shard.file).then(function (data) { return data.rows[id - shard.offset]; });
+        })).then(function (rows) {
+            if (current !== generation) {
+                return;
+            }
+            var table = document.createElement("table");
+            var header = document.createElement("tr");
+            index.fields.forEach(function (field) {
+                var th = document.createElement("th");
+                th.textContent = field;
+                header.appendChild(th);
+            });
+            table.appendChild(header);
+            rows.forEach(function (values) {
+                var row = document.createElement("tr");
+                cell(row, values[0]);
+                cell(row, index.employers[values[1]]);
+                cell(row, index.categories[values[2]]);
+                cell(row, values[3]);
+                var link = document.createElement("a");
+                link.href = index.prefixes[values[4]] + values[5];
+                link.target = "_blank";
+                link.rel = "noopener";
+                link.textContent = "View Job";
+                cell(row, "").appendChild(link);
+                table.appendChild(row);
+            });
+            var summary = document.createElement("p");
+            summary.className = "summary";
+            summary.textContent = total + " matching jobs" + (total > ids.length ? ", showing the newest " + ids.length : "");
+            results.replaceChildren(summary, table);
+        });
+    }
+
+    function update() {
+        var current = ++generation;
+        var matching = matchingDocuments();
+        if (matching === null) {
+            results.replaceChildren();
+            listing.hidden = false;
+            return;
+        }
+        matching.then(function (ids) {
+            if (current !== generation) {
+                return;
+            }
+            listing.hidden = true;
+            render(ids.slice(0, PAGE_SIZE), ids.length, current);
+        });
+    }
+
+    function init(data) {
+        index = data;
+        index.categories.forEach(function (category, position) {
+            var option = document.createElement("option");
+            option.value = String(position);
+            option.textContent = category;
+            form.category.appendChild(option);
+        });
+        var datalist = document.getElementById("employers");
+        index.employers.slice().sort().forEach(function (employer) {
+            var option = document.createElement("option");
+            option.value = employer;
+            datalist.appendChild(option);
+        });
+        form.hidden = false;
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        form = document.querySelector("form.search");
+        listing = document.getElementById("listing");
+        results = document.getElementById("results");
+        if (!form || !window.fetch) {
+            return;
+        }
+        fetch(indexUrl).then(function (response) { return response.json(); }).then(function (data) {
+            init(data);
+            var pending = null;
+            form.addEventListener("input", function () {
+                clearTimeout(pending);
+                pending = setTimeout(update, 150);
+            });
+            form.addEventListener("submit", function (event) { event.preventDefault(); update(); });
+        });
+    });
+})();
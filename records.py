@@ -0,0 +1,115 @@
+import sys
+from collections.abc import MutableMapping
+
+# Compact job record. Scrapers used to produce one dict per ad, each with its own key
+# table and its own copies of strings that repeat across thousands of ads (employer,
+# category, date, source). A Job keeps the fields in slots and interns the repeating
+# values, so a large job set holds each employer name once. It behaves as a mapping
+# with the usual field names ("Title", "Job Link", ...), so sinks, the job store and
+# csv.DictWriter take it like the dicts they were written for.
+
+# --- Configuration ---
+# Field name -> slot, in output order
+FIELDS = {
+    "Source": "source",
+    "Title": "title",
+    "Employer": "employer",
+    "Category": "category",
+    "Date": "date",
+    "Job Link": "link",
+    "Description": "description",
+}
+ALIASES = {"Publication Date": "date"}  # Field names used by older scrapers
+INTERNED = frozenset({"source", "employer", "category", "date"})  # Low-cardinality fields
+
+_SLOT_OF = {**FIELDS, **ALIASES}
+_intern = sys.intern
+
+
+def intern_value(value):
+    return _intern(value) if type(value) is str else value
+
+
+class Job(MutableMapping):
+    """
+    One job ad. Missing fields are None; any other field goes into a small `extra`
+    dict, created only when needed.
+    """
+
+    __slots__ = ("source", "title", "employer", "category", "date", "link", "description", "extra")
+
+    def __init__(self, title=None, employer=None, date=None, link=None, category=None, source=None,
+                 description=None):
+        self.title = title
+        self.employer = intern_value(employer)
+        self.date = intern_value(date)
+        self.link = link
+        self.category = intern_value(category)
+        self.source = intern_value(source)
+        self.description = description
+        self.extra = None
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """
+        Build a Job from a dict (or Job) with the usual field names.
+        """
+        job = cls()
+        for field, value in mapping.items():
+            job[field] = value
+        return job
+
+    def __getitem__(self, field):
+        slot = _SLOT_OF.get(field)
+        value = getattr(self, slot) if slot else (self.extra or {}).get(field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        # Called per field by every sink; skips the KeyError of the Mapping default
+        slot = _SLOT_OF.get(field)
+        value = getattr(self, slot) if slot else (self.extra or {}).get(field)
+        return default if value is None else value
+
+    def __setitem__(self, field, value):
+        slot = _SLOT_OF.get(field)
+        if slot:
+            setattr(self, slot, _intern(value) if slot in INTERNED and type(value) is str else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+
+    def __delitem__(self, field):
+        if field not in self:
+            raise KeyError(field)
+        slot = _SLOT_OF.get(field)
+        if slot:
+            setattr(self, slot, None)
+        else:
+            del self.extra[field]
+
+    def __contains__(self, field):
+        return self.get(field) is not None
+
+    def __iter__(self):
+        for field, slot in FIELDS.items():
+            if getattr(self, slot) is not None:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Job({dict(self)!r})"
+
+    def __reduce__(self):
+        # Rebuilt through __setitem__, so values are interned again in the receiving process
+        return _rebuild, (dict(self),)
+
+
+def _rebuild(fields):
+    return Job.from_mapping(fields)
@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import time
+from datetime import datetime
+from hashlib import blake2b
+from html import escape
+from string import Template
+
+import metrics
+
+# --- Configuration ---
+CACHE_DIR = "render_cache"  # Rendered fragments and their content hashes, kept out of public/, per namespace
+UNKNOWN_MONTH = "unknown"
+
+# Templates are parsed once at import; pages are assembled in memory and written in one call
+PAGE_TEMPLATE = Template(
+    "<html><head><meta charset='utf-8'><title>$title</title>"
+    "<link rel='stylesheet' href='styles.css'></head><body>"
+    "<h1>$heading</h1>$search$nav<div id='listing'>$body</div></body></html>"
+)
+GROUP_TEMPLATE = Template("$heading<table><tr>$header</tr>$rows</table>")
+NAV_TEMPLATE = Template("<nav class='pages'>$links</nav>")
+# Filter form driven by public/search.js from the JSON index written by search_index.SearchIndexSink
+SEARCH_TEMPLATE = Template(
+    "<form class='search' role='search' hidden>"
+    "<input type='search' name='q' placeholder='Search titles and employers'>"
+    "<select name='category'><option value=''>All categories</option></select>"
+    "<input type='search' name='employer' placeholder='Employer' list='employers'>"
+    "<datalist id='employers'></datalist></form>"
+    "<div id='results'></div>"
+    "<script src='search.js' data-index='$index' defer></script>"
+)
+LINK_CELL = Template("<td><a href='$link' target='_blank'>View Job</a></td>")
+
+
+# --- Helpers ---
+def render_rows(records, columns):
+    """
+    Render table rows with every value HTML-escaped.
+    """
+    rows = []
+    for record in records:
+        cells = []
+        for column in columns:
+            value = record.get(column)
+            value = "" if value is None else str(value)
+            if column == "Job Link":
+                cells.append(LINK_CELL.substitute(link=escape(value, quote=True)))
+            else:
+                cells.append(f"<td>{escape(value)}</td>")
+        rows.append("<tr>" + "".join(cells) + "</tr>")
+    return "".join(rows)
+
+
+def content_hash(records, columns, prefix=""):
+    """
+    Hash of the values (and heading) a fragment is rendered from.
+    """
+    digest = blake2b(digest_size=16)
+    digest.update(prefix.encode("utf-8"))
+    digest.update(b"\x1d")
+    for record in records:
+        for column in columns:
+            digest.update(str(record.get(column, "")).encode("utf-8"))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def month_of(group):
+    """
+    Page a date group belongs to: its YYYY-MM, or UNKNOWN_MONTH for non-dates.
+    """
+    group = str(group)
+    return group[:7] if group[:4].isdigit() else UNKNOWN_MONTH
+
+
+def write_if_changed(filename, text):
+    """
+    Write text in one call unless the file already holds exactly that text.
+    Returns True if the file was written.
+    """
+    data = text.encode("utf-8")
+    if os.path.exists(filename) and os.path.getsize(filename) == len(data):
+        with open(filename, "rb") as file:
+            if file.read() == data:
+                return False
+    with open(filename, "wb") as file:
+        file.write(data)
+    return True
+
+
+# --- Sink ---
+class SiteSink:
+    """
+    Render job records to a paginated static page, one record at a time.
+
+    Records must arrive grouped by `group_field` (sorted by date, as the job store
+    yields them). Each group becomes a fragment that is only re-rendered when the
+    hash of its records changes. Groups are paginated per month: the newest month is
+    written to `filename`, older months to `<name>-YYYY-MM.html`. Pages are only
+    rewritten when their content changed, so a deploy only picks up changed files.
+    With `group_field=None` all records go into a single table on a single page.
+    If `search_index` (the URL of a search_index.SearchIndexSink index, relative to
+    the page) is given, every page gets the client-side search form.
+
+    Fragments are cached under `namespace` (default: the page's base name), and
+    closing the sink drops the fragments and month pages it did not write. A page
+    must therefore have one writer: give every source its own page and namespace.
+    """
+
+    def __init__(self, filename, columns, group_field="Date", title="Job Listings by Date",
+                 cache_dir=CACHE_DIR, search_index=None, namespace=None):
+        self.filename = filename
+        self.columns = list(columns)
+        self.group_field = group_field
+        self.title = title
+        self.search = SEARCH_TEMPLATE.substitute(index=escape(search_index, quote=True)) if search_index else ""
+        base, _ = os.path.splitext(os.path.basename(filename))
+        self.base = base
+        self.cache_dir = os.path.join(cache_dir, namespace or base)
+        self.manifest_file = os.path.join(self.cache_dir, "manifest.json")
+        try:
+            with open(self.manifest_file, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.fragments = {}  # group -> fragment hashes, in arrival order
+        self.group = None
+        self.buffer = []
+        self.count = 0
+        self.rendered = 0
+        self.elapsed = 0.0  # Seconds spent rendering and writing, for metrics
+
+    def _fragment_file(self, fragment_hash):
+        return os.path.join(self.cache_dir, f"{fragment_hash}.html")
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        started = time.perf_counter()
+        # A group that shows up again in unsorted input continues under its first heading
+        continued = self.group in self.fragments
+        heading = ""
+        if self.group_field is not None and not continued:
+            heading = f"<h2>Jobs from {escape(str(self.group))}</h2>"
+        fragment_hash = content_hash(self.buffer, self.columns, heading)
+        if not os.path.exists(self._fragment_file(fragment_hash)):
+            fragment = GROUP_TEMPLATE.substitute(
+                heading=heading,
+                header="".join(f"<th>{escape(column)}</th>" for column in self.columns),
+                rows=render_rows(self.buffer, self.columns),
+            )
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._fragment_file(fragment_hash), "w", encoding="utf-8") as file:
+                file.write(fragment)
+            self.rendered += 1
+        self.fragments.setdefault(self.group, []).append(fragment_hash)
+        self.buffer = []
+        self.elapsed += time.perf_counter() - started
+
+    def write(self, record):
+        group = None if self.group_field is None else record.get(self.group_field)
+        if group != self.group:
+            self._flush()
+            self.group = group
+        self.buffer.append(record)
+        self.count += 1
+
+    def page_file(self, month, newest):
+        """
+        File name of a month's page; the newest month is the main page.
+        """
+        if month == newest:
+            return self.filename
+        return os.path.join(os.path.dirname(self.filename), f"{self.base}-{month}.html")
+
+    def close(self):
+        self._flush()
+        started = time.perf_counter()
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Group the fragments into one page per month (or one page without grouping)
+        pages = {}
+        for group, fragment_hashes in self.fragments.items():
+            month = "all" if self.group_field is None else month_of(group)
+            pages.setdefault(month, []).append((group, fragment_hashes))
+        if not pages:
+            pages["all"] = []
+        dated = sorted((month for month in pages if month != UNKNOWN_MONTH), reverse=True)
+        months = dated + ([UNKNOWN_MONTH] if UNKNOWN_MONTH in pages else [])
+        newest = months[0]
+
+        nav = ""
+        if len(months) > 1:
+            links = " ".join(
+                f"<a href='{escape(os.path.basename(self.page_file(month, newest)), quote=True)}'>{month}</a>"
+                for month in months
+            )
+            nav = NAV_TEMPLATE.substitute(links=links)
+
+        written = 0
+        for month in months:
+            body = []
+            for group, fragment_hashes in sorted(pages[month], key=lambda item: str(item[0]), reverse=True):
+                for fragment_hash in fragment_hashes:
+                    with open(self._fragment_file(fragment_hash), encoding="utf-8") as file:
+                        body.append(file.read())
+            page = PAGE_TEMPLATE.substitute(title="Job Listings", heading=escape(self.title),
+                                            search=self.search, nav=nav, body="".join(body))
+            written += write_if_changed(self.page_file(month, newest), page)
+
+        # Drop the pages of months that no longer have any rows
+        live_pages = {os.path.basename(self.page_file(month, newest)) for month in months}
+        month_page = re.compile(rf"{re.escape(self.base)}-(\d{{4}}-\d{{2}}|{UNKNOWN_MONTH})\.html")
+        for filename in os.listdir(directory or "."):
+            if month_page.fullmatch(filename) and filename not in live_pages:
+                os.remove(os.path.join(directory, filename))
+
+        # Forget fragments that are no longer part of the site
+        live = {fragment_hash for hashes in self.fragments.values() for fragment_hash in hashes}
+        previous = {fragment_hash for hashes in self.manifest.get("fragments", {}).values()
+                    for fragment_hash in hashes}
+        for fragment_hash in previous - live:
+            try:
+                os.remove(self._fragment_file(fragment_hash))
+            except OSError:
+                pass
+        self.manifest = {"fragments": {str(group): hashes for group, hashes in self.fragments.items()}}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_if_changed(self.manifest_file, json.dumps(self.manifest, indent=1, sort_keys=True))
+
+        elapsed = self.elapsed + time.perf_counter() - started
+        metrics.observe("render_seconds", elapsed, page=self.base)
+        metrics.event("render", page=self.base, jobs=self.count, fragments_rendered=self.rendered,
+                      pages_written=written, pages=len(months), seconds=round(elapsed, 3))
+        print(f"[{datetime.now()}] Saved {self.count} jobs to HTML file: {self.filename} "
+              f"({self.rendered} fragments re-rendered, {written}/{len(months)} pages written)")
+
+
+def save_to_html(jobs, filename, columns, **options):
+    """
+    Render jobs (sorted by date) to `filename`, see SiteSink. Returns the number of jobs.
+    """
+    sink = SiteSink(filename, columns, **options)
+    try:
+        for job in jobs:
+            sink.write(job)
+    finally:
+        sink.close()
+    return sink.count
@@ -1,54 +1,244 @@
-import schedule
-import time
+import argparse
 import os
-from datetime import datetime
 import sys
-import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import schedule
+
+import analytics
+import connectors
+import deploy as deploy_site
+import job_store
+import metrics
+import pipeline
+import vakanser
+
+# --- Configuration ---
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE = os.path.join(PROJECT_DIR, "scheduler_log.txt")
+LOCK_FILE = os.path.join(PROJECT_DIR, "scheduler.lock")
+RUN_AT = "13:05"  # Daily start of the pipeline
+CRAWL_TIMEOUT = 30 * 60  # Seconds
+RENDER_TIMEOUT = 10 * 60
+DEPLOY_TIMEOUT = 15 * 60
+STALE_LOCK_AGE = 3 * 60 * 60  # A lock file older than this is left over from a crashed run
+
+_run_lock = threading.Lock()
+_last_success = None  # Time of the last fully successful run, kept across metrics.reset()
+_abandoned = []  # Futures of timed-out tasks still running; the run lock is held until they finish
 
 def log_message(message):
-    now_str = datetime.now().strftime("%d/%m/%Y, %H:%M:%S")
-    with open("scheduler_log.txt", "a") as log_file:
-        log_file.write(f"{now_str}-{message} \n")
+    # Queued and written by a background thread, see metrics.buffered_logger
+    logger = metrics.buffered_logger("scheduler", LOG_FILE, "%(asctime)s-%(message)s ", "%d/%m/%Y, %H:%M:%S")
+    logger.info(message)
+
+# --- Task graph ---
+class Task:
+    """
+    A unit of work in the pipeline, started once all tasks in `deps` succeeded.
+    """
+
+    def __init__(self, name, func, deps=(), timeout=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+
+def run_tasks(tasks, abandoned=None):
+    """
+    Run a task graph, starting every task as soon as its dependencies succeeded so
+    independent tasks run concurrently. Tasks downstream of a failure are skipped.
+    A task that exceeds its timeout is marked "timeout" and its thread is abandoned
+    (threads cannot be killed); its future is appended to the `abandoned` list, if given.
+    Returns {task name: "ok" | "failed" | "timeout" | "skipped"}.
+    """
+    pending = {task.name: task for task in tasks}
+    status = {}
+    running = {}  # future -> (task, deadline, start time)
+    executor = ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix="task")
+    try:
+        while pending or running:
+            for name, task in list(pending.items()):
+                if any(dep in status and status[dep] != "ok" for dep in task.deps):
+                    status[name] = "skipped"
+                    log_message(f"{name} skipped, an upstream task did not succeed")
+                    del pending[name]
+                elif all(status.get(dep) == "ok" for dep in task.deps):
+                    log_message(f"Running {name}...")
+                    deadline = time.monotonic() + task.timeout if task.timeout else None
+                    running[executor.submit(task.func)] = (task, deadline, time.monotonic())
+                    del pending[name]
+
+            if not running:
+                # Whatever is left depends on tasks that are not part of the graph
+                for name in pending:
+                    status[name] = "skipped"
+                    log_message(f"{name} skipped, unknown dependency")
+                break
 
-def run_vakanser():
-    log_message("Running vakanser.py...")
-    log_message("Running vakanser.py...")
-    result = os.system("C:\\Users\\Mahsa\\AppData\\Local\\Programs\\Python\\Python313\\python.exe C:\\Users\\Mahsa\\Desktop\\NewFolder\\projects\\python\\Job_Search_Data\\vakanser.py")
+            deadlines = [deadline for _, deadline, _ in running.values() if deadline is not None]
+            timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
 
-    log_message(f"vakanser.py finished with status {result}")
+            for future in done:
+                task, _, started = running.pop(future)
+                error = future.exception()
+                status[task.name] = "failed" if error else "ok"
+                outcome = f"failed: {error!r}" if error else "finished"
+                elapsed = time.monotonic() - started
+                metrics.observe("task_seconds", elapsed, task=task.name)
+                log_message(f"{task.name} {outcome} after {elapsed:.1f}s")
 
-def run_arbetsformedlingen():
-    log_message("Running arbetsformedlingen.py...")
-    result = os.system("C:\\Users\\Mahsa\\AppData\\Local\\Programs\\Python\\Python313\\python.exe C:\\Users\\Mahsa\\Desktop\\NewFolder\\projects\\python\\Job_Search_Data\\arbetsformedlingen.py")
-    log_message(f"arbetsformedlingen.py finished with status {result}")
+            now = time.monotonic()
+            for future, (task, deadline, _) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[future]
+                    status[task.name] = "timeout"
+                    log_message(f"{task.name} timed out after {task.timeout}s")
+                    if abandoned is not None:
+                        abandoned.append(future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    for name, outcome in status.items():
+        metrics.inc("tasks_total", task=name, status=outcome)
+        metrics.event("task", task=name, status=outcome)
+    return status
+
+# --- Tasks ---
+def crawl_task(name):
+    """
+    Task crawling one connector into the job store.
+    """
+    def crawl():
+        job_counts = Counter()
+        conn = job_store.connect()
+        try:
+            new_count = connectors.crawl(name, conn,
+                                         tap=lambda jobs: pipeline.count_by(jobs, "Category", job_counts))
+        finally:
+            conn.close()
+        log_message(f"{name}: {new_count} new jobs, {dict(job_counts)}")
+    return Task(name, crawl, timeout=CRAWL_TIMEOUT)
+
+def render():
+    conn = job_store.connect()
+    try:
+        for name in SOURCES:
+            connectors.publish(name, conn)
+        analytics.refresh(conn)  # Only the runs of this crawl are folded in
+        analytics.write_summary(conn)
+    finally:
+        conn.close()
 
 def deploy():
-    log_message("Running Firebase deploy...")
-    
-    firebase_path = "C:\\Users\\Mahsa\\AppData\\Roaming\\npm\\firebase.cmd"
-    project_path = "C:\\Users\\Mahsa\\Desktop\\NewFolder\\projects\\python\\Job_Search_Data"
-
-    result = subprocess.run(
-        [firebase_path, "deploy", "--debug"],
-        cwd=project_path,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        shell=True
-    )
-
-    log_message(f"Firebase deploy finished with status {result.returncode}")
-    log_message(f"DEBUG STDOUT: {result.stdout}")
-    log_message(f"DEBUG STDERR: {result.stderr}")
-
-schedule.every().day.at("13:05").do(run_vakanser)
-schedule.every().day.at("13:10").do(run_arbetsformedlingen)
-schedule.every().day.at("13:15").do(deploy)
-
-log_message("Scheduler started...")
-log_message(f"Python Executable: {sys.executable}")
-log_message(f"Current Working Directory: {os.getcwd()}")
-
-while True:
-    schedule.run_pending()
-    time.sleep(60)
+    # Only the files of public/ changed since the last deploy, nothing if none did
+    changed, removed = deploy_site.deploy(deploy_site.FirebaseTarget())
+    log_message(f"Deploy finished: {len(changed)} changed and {len(removed)} removed files")
+
+SOURCES = connectors.scheduled()  # One crawl task per connector, see connectors.register
+PIPELINE = [
+    *(crawl_task(name) for name in SOURCES),
+    Task("render", render, deps=SOURCES, timeout=RENDER_TIMEOUT),
+    Task("deploy", deploy, deps=("render",), timeout=DEPLOY_TIMEOUT),
+]
+
+# --- Overlap protection ---
+def acquire_lock():
+    """
+    Take the cross-process run lock. Returns False if another run holds it.
+    """
+    if not _run_lock.acquire(blocking=False):
+        return False
+    try:
+        if os.path.exists(LOCK_FILE) and time.time() - os.path.getmtime(LOCK_FILE) > STALE_LOCK_AGE:
+            log_message("Removing stale lock file")
+            os.remove(LOCK_FILE)
+        fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        _run_lock.release()
+        return False
+    with os.fdopen(fd, "w") as lock_file:
+        lock_file.write(f"{os.getpid()} {datetime.now().isoformat()}\n")
+    return True
+
+def remove_lock_file():
+    try:
+        os.remove(LOCK_FILE)
+    except OSError:
+        pass
+
+def release_lock():
+    remove_lock_file()
+    _run_lock.release()
+
+def release_lock_when_done(futures):
+    """
+    Release the run lock once the abandoned tasks have finished, so the next run
+    cannot start while they still write to the job store or public/.
+    """
+    wait(futures)
+    log_message("Timed-out tasks finished, run lock released")
+    _abandoned.clear()
+    release_lock()
+
+def run_pipeline(tasks=PIPELINE):
+    global _last_success
+    if not acquire_lock():
+        log_message("Previous run still in progress, skipping this one")
+        return None
+    try:
+        log_message("Pipeline started")
+        metrics.reset()
+        started = time.monotonic()
+        status = run_tasks(tasks, _abandoned)
+        elapsed = time.monotonic() - started
+        metrics.observe("pipeline_seconds", elapsed)
+        if all(value == "ok" for value in status.values()):
+            _last_success = int(time.time())
+        if _last_success is not None:
+            metrics.set_gauge("last_success_timestamp_seconds", _last_success)
+        metrics.export(run=datetime.now().isoformat(timespec="seconds"))
+        log_message(f"Pipeline finished in {elapsed:.1f}s: {status}")
+        return status
+    finally:
+        if any(not future.done() for future in _abandoned):
+            log_message(f"{len(_abandoned)} timed-out tasks still running, run lock held until they finish")
+            threading.Thread(target=release_lock_when_done, args=(list(_abandoned),), daemon=True,
+                             name="lock-release").start()
+        else:
+            _abandoned.clear()
+            release_lock()
+
+# --- Main ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the crawl, render and deploy pipeline daily.")
+    parser.add_argument("--once", action="store_true", help="Run the pipeline now and exit")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_DIR)  # The scrapers write their outputs relative to the project
+    log_message("Scheduler started...")
+    log_message(f"Python Executable: {sys.executable}")
+    log_message(f"Current Working Directory: {os.getcwd()}")
+
+    # One warm process for every run: the scrapers stay imported, the HTTP session keeps
+    # its connection pools and the parser processes are started once, here
+    pipeline.warm_up(vakanser.__name__)
+
+    if args.once:
+        status = run_pipeline()
+        if any(not future.done() for future in _abandoned):
+            # Exiting normally would wait for the abandoned threads: end the process instead
+            log_message("Stopping timed-out tasks by exiting")
+            remove_lock_file()
+            metrics.flush()
+            os._exit(1)
+        sys.exit(0 if status and all(value == "ok" for value in status.values()) else 1)
+
+    schedule.every().day.at(RUN_AT).do(run_pipeline)
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
@@ -0,0 +1,162 @@
+import json
+import os
+from datetime import datetime
+
+import metrics
+from dedup import normalize_title
+from render import UNKNOWN_MONTH, month_of, write_if_changed
+
+# The published site carries its data as compact JSON next to the HTML pages:
+#   <directory>/index.json        field dictionaries and the lists of shards
+#   <directory>/<YYYY-MM>.json    the rows of one month
+#   <directory>/terms-<c>.json    the inverted index of the terms starting with c
+#   <directory>/filters.json      postings per category and employer
+# Only index.json is loaded with the page; the client fetches a term shard when a
+# query word starts with its character, the filters when a filter is set and the
+# months of the rows it shows, so what a search downloads does not grow with the
+# whole archive. Repeated values (employers, categories, link prefixes) are stored
+# once in the index and referenced by position, and postings are delta-encoded
+# document numbers, so the files stay small and compress well. public/search.js
+# reads this format.
+
+# --- Configuration ---
+FORMAT_VERSION = 2
+MIN_TERM_LENGTH = 2
+JSON_OPTIONS = {"ensure_ascii": False, "separators": (",", ":"), "sort_keys": True}
+
+
+# --- Helpers ---
+def tokens(text):
+    """
+    Search terms of a text; public/search.js tokenizes queries the same way.
+    """
+    return {token for token in normalize_title(text).split() if len(token) >= MIN_TERM_LENGTH}
+
+
+def split_link(link):
+    """
+    Split a link into its directory and the last path segment.
+    """
+    head, _, tail = str(link).rstrip("/").rpartition("/")
+    return (head + "/", tail + ("/" if str(link).endswith("/") else "")) if head else ("", str(link))
+
+
+def term_shard(term):
+    """
+    Key of the term shard holding `term`: its first character, "_" for + and #.
+    public/search.js picks shards the same way.
+    """
+    return term[0] if term[0].isalnum() else "_"
+
+
+def delta_encode(numbers):
+    previous = 0
+    encoded = []
+    for number in numbers:
+        encoded.append(number - previous)
+        previous = number
+    return encoded
+
+
+class Dictionary:
+    """
+    Assigns each distinct value a position in a list.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.positions = {}
+
+    def __call__(self, value):
+        position = self.positions.get(value)
+        if position is None:
+            position = self.positions[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+# --- Sink ---
+class SearchIndexSink:
+    """
+    Write records as per-month JSON shards plus a prebuilt search index over titles
+    and employers, sharded by the first character of the terms, with postings per
+    category and employer for the client filters. Files are only rewritten when
+    their content changed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.months = {}  # month -> rows
+        self.employers = Dictionary()
+        self.categories = Dictionary()
+        self.prefixes = Dictionary()
+        self.count = 0
+
+    def write(self, record):
+        prefix, tail = split_link(record.get("Job Link") or "")
+        row = [
+            record.get("Title") or "",
+            self.employers(record.get("Employer") or ""),
+            self.categories(record.get("Category") or ""),
+            record.get("Date") or "",
+            self.prefixes(prefix),
+            tail,
+        ]
+        self.months.setdefault(month_of(row[3]), []).append(row)
+        self.count += 1
+
+    @metrics.timed("index_seconds")
+    def close(self):
+        os.makedirs(self.directory, exist_ok=True)
+        dated = sorted((month for month in self.months if month != UNKNOWN_MONTH), reverse=True)
+        months = dated + ([UNKNOWN_MONTH] if UNKNOWN_MONTH in self.months else [])
+
+        # Documents are numbered newest month first, in row order within a month
+        terms, by_category, by_employer = {}, {}, {}
+        shards, written, document = [], 0, 0
+        for month in months:
+            rows = self.months[month]
+            shard_file = f"{month}.json"
+            shards.append({"file": shard_file, "month": month, "offset": document, "count": len(rows)})
+            for title, employer, category, *_ in rows:
+                for term in tokens(title) | tokens(self.employers.values[employer]):
+                    terms.setdefault(term, []).append(document)
+                by_category.setdefault(category, []).append(document)
+                by_employer.setdefault(employer, []).append(document)
+                document += 1
+            shard = json.dumps({"month": month, "rows": rows}, **JSON_OPTIONS)
+            written += write_if_changed(os.path.join(self.directory, shard_file), shard)
+
+        term_shards = {}
+        for term, postings in terms.items():
+            term_shards.setdefault(term_shard(term), {})[term] = delta_encode(postings)
+        for key, shard_terms in term_shards.items():
+            written += write_if_changed(os.path.join(self.directory, f"terms-{key}.json"),
+                                        json.dumps(shard_terms, **JSON_OPTIONS))
+        filters = {
+            "byCategory": [delta_encode(by_category.get(i, [])) for i in range(len(self.categories.values))],
+            "byEmployer": [delta_encode(by_employer.get(i, [])) for i in range(len(self.employers.values))],
+        }
+        written += write_if_changed(os.path.join(self.directory, "filters.json"), json.dumps(filters, **JSON_OPTIONS))
+
+        index = {
+            "version": FORMAT_VERSION,
+            "fields": ["Title", "Employer", "Category", "Date", "Job Link"],
+            "count": document,
+            "shards": shards,
+            "termShards": sorted(term_shards),
+            "employers": self.employers.values,
+            "categories": self.categories.values,
+            "prefixes": self.prefixes.values,
+        }
+        written += write_if_changed(os.path.join(self.directory, "index.json"), json.dumps(index, **JSON_OPTIONS))
+
+        # Drop the shards of months and terms that no longer have any rows
+        live = {shard["file"] for shard in shards} | {f"terms-{key}.json" for key in term_shards}
+        live |= {"index.json", "filters.json"}
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".json") and filename not in live:
+                os.remove(os.path.join(self.directory, filename))
+
+        print(f"[{datetime.now()}] Indexed {self.count} jobs in {self.directory} "
+              f"({len(terms)} terms, {written}/{len(live)} files written)")
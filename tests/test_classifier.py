@@ -0,0 +1,69 @@
+import csv
+import os
+
+import pytest
+
+from classifier import CONSULTANCY_COMPANIES, NON_CONSULTANCY_COMPANIES, EmployerClassifier
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_FILES = ["all_jobs_gothenburg.csv", "filtered_jobs_gothenburg.csv", "all_jobs_vakanser.csv",
+             "filtered_jobs_vakanser.csv"]
+
+
+def legacy_classify(employer):
+    # The substring check arbetsformedlingen.classify_job did before EmployerClassifier
+    employer = employer.lower()
+    if any(company.lower() in employer for company in NON_CONSULTANCY_COMPANIES):
+        return "Non-Consultancy"
+    if any(company.lower() in employer for company in CONSULTANCY_COMPANIES):
+        return "Consultancy"
+    return None
+
+
+def stored_employers():
+    employers = set()
+    for name in CSV_FILES:
+        with open(os.path.join(ROOT, name), encoding="utf-8") as file:
+            employers.update(row["Employer"] for row in csv.DictReader(file) if row.get("Employer"))
+    return sorted(employers)
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return EmployerClassifier(NON_CONSULTANCY_COMPANIES, CONSULTANCY_COMPANIES)
+
+
+def test_agrees_with_legacy_classifier_on_stored_employers(classifier):
+    employers = stored_employers()
+    assert employers
+    differences = {employer: (classifier.classify(employer), legacy_classify(employer)) for employer in employers
+                   if classifier.classify(employer) != legacy_classify(employer)}
+    assert differences == {}
+
+
+@pytest.mark.parametrize("employer, category", [
+    ("Volvo Car Corporation", "Non-Consultancy"),
+    ("Knightec AB", "Consultancy"),
+    ("Knightec", "Consultancy"),  # Listed with a legal form, stored without
+    ("Mgmt by Logikfabriken AB", "Non-Consultancy"),
+    ("Sogeti Sverige AB", "Consultancy"),
+    ("Academic Work Sweden AB", "Consultancy"),
+    ("SJ AB", "Non-Consultancy"),
+    ("SJ", "Non-Consultancy"),
+])
+def test_listed_companies(classifier, employer, category):
+    assert classifier.classify(employer) == category
+
+
+@pytest.mark.parametrize("employer", [
+    "Framtiden i Sverige AB",  # Not "Framtiden AB"; the substring check got this wrong
+    "SJ Götalandståg AB",
+    "Unknown Employer",
+    "",
+])
+def test_unlisted_companies(classifier, employer):
+    assert classifier.classify(employer) is None
+
+
+def test_non_consultancy_wins(classifier):
+    assert classifier.classify("Volvo Group via Academic Work") == "Non-Consultancy"
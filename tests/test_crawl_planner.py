@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+import crawl_planner
+from crawl_planner import MAX_RESULTS, PAGE_LIMIT, Planner, Shard
+
+MUNICIPALITIES = ("1480", "1481")
+KEYWORDS = ("python", "java", "c++", "devops")
+
+
+class FakeSearchApi:
+    """
+    The search API over a fixed set of ads, with its offset cap: offsets above
+    2000 are rejected.
+    """
+
+    def __init__(self, ads, fail=()):
+        self.ads = ads  # (id, municipality, keyword, publication date)
+        self.fail = set(fail)  # Offsets that always fail
+        self.offsets = []
+
+    def __call__(self, query, municipality, occupation_field, offset, limit=PAGE_LIMIT, published_after=None,
+                 published_before=None):
+        self.offsets.append(offset)
+        assert offset <= MAX_RESULTS - PAGE_LIMIT, "offset beyond the API's paging limit"
+        if offset in self.fail:
+            return None
+        hits = [
+            {"id": ad_id, "publication_date": published}
+            for ad_id, place, keyword, published in self.ads
+            if place in municipality and keyword in query
+            and (published_after is None or published >= published_after)
+            and (published_before is None or published < published_before)
+        ]
+        return {"total": {"value": len(hits)}, "hits": hits[offset:offset + limit]}
+
+
+def make_ads(count):
+    today = date.today()
+    return [
+        (str(i), MUNICIPALITIES[i % 2], KEYWORDS[i % 4], (today - timedelta(days=i % 300)).isoformat())
+        for i in range(count)
+    ]
+
+
+def crawl(api, shards):
+    planner = Planner(api, concurrency=4)
+    ids = [hit["id"] for page in planner.pages(shards) for hit in page]
+    return planner, ids
+
+
+def test_small_shard_is_not_split():
+    api = FakeSearchApi(make_ads(450))
+    planner, ids = crawl(api, crawl_planner.initial_shards(MUNICIPALITIES, ["field"], KEYWORDS))
+    assert planner.splits == 0
+    assert sorted(ids, key=int) == [str(i) for i in range(450)]
+    assert sorted(api.offsets) == [0, 100, 200, 300, 400]
+
+
+def test_shards_over_the_offset_cap_are_split_until_they_fit():
+    api = FakeSearchApi(make_ads(20000))
+    planner, ids = crawl(api, crawl_planner.initial_shards(MUNICIPALITIES, ["field"], KEYWORDS))
+    assert planner.splits > 0
+    assert len(ids) == len(set(ids)) == 20000  # Every ad once, none lost to the cap
+    assert max(api.offsets) <= MAX_RESULTS - PAGE_LIMIT
+    assert planner.failed == []
+
+
+def test_split_order_is_municipality_keywords_then_dates():
+    shard = Shard(MUNICIPALITIES, "field", KEYWORDS)
+    by_place = shard.split()
+    assert [half.municipalities for half in by_place] == [("1480",), ("1481",)]
+    by_keyword = by_place[0].split()
+    assert [half.keywords for half in by_keyword] == [KEYWORDS[:2], KEYWORDS[2:]]
+    by_date = Shard(("1480",), "field", ("python",), "2025-01-01", "2025-03-01").split()
+    assert [(half.published_after, half.published_before) for half in by_date] == [
+        ("2025-01-01", "2025-01-30"), ("2025-01-30", "2025-03-01")]
+    assert Shard(("1480",), "field", ("python",), "2025-01-01", "2025-01-02").split() == []
+
+
+def test_failed_pages_are_retried_then_reported():
+    api = FakeSearchApi(make_ads(450), fail={200})
+    planner, ids = crawl(api, crawl_planner.initial_shards(MUNICIPALITIES, ["field"], KEYWORDS))
+    assert api.offsets.count(200) == 1 + crawl_planner.PAGE_RETRIES
+    assert [offset for _, offset in planner.failed] == [200]
+    assert len(ids) == 350
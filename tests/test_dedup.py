@@ -0,0 +1,52 @@
+import dedup
+
+
+def record(title, employer, date="2025-05-01", source="a", link=None):
+    return {"Title": title, "Employer": employer, "Date": date, "Source": source, "Job Link": link or "N/A"}
+
+
+def test_same_vacancy_across_sources_is_merged():
+    deduplicator = dedup.Deduplicator()
+    first = deduplicator.add(record("Senior Java Developer", "Volvo Cars AB", source="a", link="https://a/1"))
+    second = deduplicator.add(record("Senior Java-developer", "Volvo Cars", "2025-05-03", "b", "https://b/1"))
+    assert first is second
+    merged = list(deduplicator.merged())
+    assert len(merged) == 1
+    assert merged[0]["Sources"] == "a, b"
+    assert merged[0]["Links"] == "https://a/1 https://b/1"
+
+
+def test_unknown_employer_matches_any_employer():
+    deduplicator = dedup.Deduplicator()
+    known = deduplicator.add(record("Embedded Software Engineer", "Saab AB"))
+    assert deduplicator.add(record("Embedded Software Engineer", "")) is known
+    assert deduplicator.add(record("Embedded Software Engineers", "Saab")) is known
+
+
+def test_same_title_at_other_employer_is_not_merged():
+    deduplicator = dedup.Deduplicator()
+    first = deduplicator.add(record("Software Engineer", "Volvo Cars AB"))
+    assert deduplicator.add(record("Software Engineer", "Saab AB")) is not first
+    assert len(deduplicator.clusters) == 2
+
+
+def test_postings_too_far_apart_are_not_merged():
+    deduplicator = dedup.Deduplicator()
+    first = deduplicator.add(record("Software Engineer", "Volvo Cars AB", "2025-01-01"))
+    assert deduplicator.add(record("Software Engineer", "Volvo Cars AB", "2025-03-01")) is not first
+
+
+def test_different_titles_are_not_merged():
+    deduplicator = dedup.Deduplicator()
+    first = deduplicator.add(record("Backend Developer", "Volvo Cars AB"))
+    assert deduplicator.add(record("Test Automation Engineer", "Volvo Cars AB")) is not first
+
+
+def test_common_titles_are_only_compared_within_their_employer():
+    deduplicator = dedup.Deduplicator()
+    for i in range(200):
+        deduplicator.add(record("Software Engineer", f"Company {i} AB"))
+    comparisons = deduplicator.comparisons
+    deduplicator.add(record("Software Engineers", "Company 7 AB"))
+    assert deduplicator.comparisons - comparisons == 1
+    assert len(deduplicator.clusters) == 200
@@ -0,0 +1,48 @@
+import pytest
+
+import job_store
+from records import Job
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = job_store.connect(str(tmp_path / "jobs.sqlite"))
+    yield conn
+    conn.close()
+
+
+def test_job_key_normalizes_links():
+    assert job_store.job_key(Job(link="HTTPS://Vakanser.se/Jobb/123/?utm=x#top")) == "https://vakanser.se/Jobb/123"
+
+
+def test_job_key_without_link_uses_title_employer_and_date():
+    first = Job("Java  Developer", "Volvo Cars", "2025-05-01", "N/A")
+    same = Job("java developer", "VOLVO CARS", "2025-05-01", "")
+    other = Job("Java Developer", "Volvo Cars", "2025-05-02", "N/A")
+    assert job_store.job_key(first) == job_store.job_key(same) == "nolink:java developer|volvo cars|2025-05-01"
+    assert job_store.job_key(first) != job_store.job_key(other)
+
+
+def test_merge_jobs_keeps_ads_without_links_apart(conn):
+    jobs = [Job("A", "E", "2025-05-01", "N/A"), Job("B", "E", "2025-05-01", "N/A"), Job("A", "E", "2025-05-01", "")]
+    assert job_store.merge_jobs(conn, "test", jobs) == 2
+
+
+def test_incomplete_merge_keeps_the_watermark(conn):
+    job_store.merge_jobs(conn, "test", [Job("A", "E", "2025-05-01", "https://a/1")])
+    assert job_store.get_watermark(conn, "test") == "2025-05-01"
+
+    new = job_store.merge_jobs(conn, "test", [Job("B", "E", "2025-06-01", "https://a/2")], complete=lambda: False)
+    assert new == 1  # The ads are stored all the same
+    assert job_store.get_watermark(conn, "test") == "2025-05-01"
+
+    job_store.merge_jobs(conn, "test", [Job("B", "E", "2025-06-01", "https://a/2")], complete=lambda: True)
+    assert job_store.get_watermark(conn, "test") == "2025-06-01"
+
+
+def test_remove_keys_takes_stored_keys(conn):
+    jobs = [Job("C# dev?", "E", "2025-05-01", "N/A"), Job("B", "E", "2025-05-01", "https://a/2")]
+    job_store.merge_jobs(conn, "test", jobs)
+    keys = job_store.known_links(conn, "test")
+    assert job_store.remove_keys(conn, "test", keys) == 2
+    assert job_store.known_links(conn, "test") == set()
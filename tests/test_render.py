@@ -0,0 +1,46 @@
+import render
+
+
+def rows(*dates):
+    return [{"Title": f"Job {date}", "Date": date, "Job Link": "https://a/1"} for date in dates]
+
+
+def save(tmp_path, records, filename="jobs.html", **options):
+    public = tmp_path / "public"
+    return render.save_to_html(records, str(public / filename), ["Title", "Date", "Job Link"],
+                               cache_dir=str(tmp_path / "cache"), **options)
+
+
+def pages(tmp_path):
+    return sorted(path.name for path in (tmp_path / "public").iterdir())
+
+
+def test_one_page_per_month(tmp_path):
+    save(tmp_path, rows("2025-03-02", "2025-03-01", "2025-02-01", "Unknown Date"))
+    assert pages(tmp_path) == ["jobs-2025-02.html", "jobs-unknown.html", "jobs.html"]
+
+
+def test_month_pages_without_rows_are_deleted(tmp_path):
+    save(tmp_path, rows("2025-03-01", "2025-02-01", "2025-01-01", "Unknown Date"))
+    (tmp_path / "public" / "styles.css").write_text("")
+    (tmp_path / "public" / "other-2025-01.html").write_text("")
+
+    save(tmp_path, rows("2025-03-01", "2025-02-01"))
+    assert pages(tmp_path) == ["jobs-2025-02.html", "jobs.html", "other-2025-01.html", "styles.css"]
+
+
+def test_pages_of_other_sinks_are_left_alone(tmp_path):
+    save(tmp_path, rows("2025-03-01", "2025-02-01"), namespace="site")
+    save(tmp_path, rows("2025-03-01"), filename="main-jobs.html", group_field=None)
+    assert pages(tmp_path) == ["jobs-2025-02.html", "jobs.html", "main-jobs.html"]
+    assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == ["main-jobs", "site"]
+
+
+def test_unchanged_pages_are_not_rewritten(tmp_path):
+    save(tmp_path, rows("2025-03-01", "2025-02-01"))
+    sink = render.SiteSink(str(tmp_path / "public" / "jobs.html"), ["Title", "Date", "Job Link"],
+                           cache_dir=str(tmp_path / "cache"))
+    for row in rows("2025-03-01", "2025-02-01"):
+        sink.write(row)
+    sink.close()
+    assert sink.rendered == 0
@@ -0,0 +1,62 @@
+import pytest
+
+import vakanser
+from records import Job
+
+PAGES = 40
+ADS_PER_PAGE = 10
+
+
+def page_jobs(page_number):
+    # Newest first: ten pages per month, one day per page, from July 2025 back
+    month, day = 7 - (page_number - 1) // 10, 30 - (page_number - 1) % 10
+    return [Job(f"Job {page_number}-{i}", "E", f"2025-{month:02d}-{day:02d}", f"https://vakanser.se/{page_number}/{i}")
+            for i in range(ADS_PER_PAGE)]
+
+
+class FakeSite:
+    """
+    Listing pages as `fetch_html` returns them: the page, b"" past the last page,
+    None for a failed fetch. `failures` maps page numbers to fetches that fail.
+    """
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.fetched = []
+
+    def __call__(self, page_number):
+        self.fetched.append(page_number)
+        if self.failures.get(page_number):
+            self.failures[page_number] -= 1
+            return None
+        return str(page_number).encode() if page_number <= PAGES else b""
+
+
+@pytest.fixture(autouse=True)
+def fake_pages(monkeypatch):
+    monkeypatch.setattr(vakanser, "parse_page", lambda content: page_jobs(int(content)) if content else [])
+
+
+def test_finds_the_last_page_of_the_range():
+    last_page, probed = vakanser.find_last_page("2025-05-01", fetch=FakeSite())
+    assert last_page == 30  # Pages 21-30 hold May
+    assert 30 in probed and 31 in probed
+
+
+def test_past_the_end_of_the_listing():
+    assert vakanser.find_last_page("2025-01-01", fetch=FakeSite())[0] == PAGES
+
+
+def test_failed_probe_is_retried():
+    failures = []
+    site = FakeSite({16: vakanser.PROBE_RETRIES})
+    assert vakanser.find_last_page("2025-05-01", fetch=site, failures=failures)[0] == 30
+    assert site.fetched.count(16) == vakanser.PROBE_RETRIES + 1
+    assert failures == []
+
+
+def test_probe_that_keeps_failing_is_reported():
+    failures = []
+    last_page, _ = vakanser.find_last_page("2025-05-01", fetch=FakeSite({16: 99}), failures=failures)
+    assert last_page < 30  # The range is cut short...
+    assert failures == [16]  # ...but the caller knows, and keeps its watermark
@@ -1,151 +1,225 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import os
 from datetime import datetime
-import time
+
+import html_parsing
+import http_client
+import job_store
+import metrics
+import pipeline
+import render
+import search_index
+from records import Job
 
 # --- Configuration ---
 BASE_URL = "https://vakanser.se/alla/datajobb/i/goteborg/{}/"
 OUTPUT_FILE = "all_jobs_vakanser.csv"
 HTML_FILE = "public/vakanser.html"
+INDEX_DIR = "public/data/vakanser"  # JSON shards and search index for public/search.js
+SOURCE = "vakanser"
+INCREMENTAL = True  # Stop at the first page of already known ads and merge new ones into the job store
+CSV_COLUMNS = ["Date", "Title", "Employer", "Job Link"]
+HTML_COLUMNS = ["Title", "Employer", "Date", "Job Link"]
 TARGET_DATE = "2025-05-01"  # Change this to your desired stop date
 target_date_obj = datetime.strptime(TARGET_DATE, "%Y-%m-%d")
-
-def fetch_html(page_number, retries=3, delay=2):
-    """Fetch HTML content for a specific page number, with retries."""
-    for _ in range(retries):
-        try:
-            response = requests.get(BASE_URL.format(page_number), timeout=10)
-            if response.status_code == 200:
-                return response.content
-            elif response.status_code == 404:
-                print(f"Page {page_number} does not exist (404). Stopping.")
-                return None
-        except requests.RequestException as e:
-            print(f"Error fetching page {page_number}: {e}")
-        time.sleep(delay)
-    print(f"Failed to fetch page {page_number} after {retries} retries.")
+MAX_PAGES = 1000  # Upper bound of the page probe
+PROBE_RETRIES = 2  # Extra attempts at a probed page that could not be fetched
+UNKNOWN_DATE = "Unknown Date"
+
+def fetch_html(page_number, retries=3):
+    """
+    Fetch HTML content for a specific page number, with retries. Returns b"" for a
+    page that does not exist (404) and None for one that could not be fetched.
+    """
+    try:
+        response = http_client.get(BASE_URL.format(page_number), retries=retries)
+    except requests.RequestException as e:
+        print(f"Failed to fetch page {page_number} after {retries} retries: {e}")
+        return None
+    if response.status_code == 200:
+        metrics.inc("pages_total", source=SOURCE)
+        return response.content
+    if response.status_code == 404:
+        print(f"Page {page_number} does not exist (404). Stopping.")
+        return b""
+    print(f"Failed to fetch page {page_number}. Status: {response.status_code}")
     return None
 
-def parse_html(html_content):
-    """Parse job data from a single page of HTML content."""
-    soup = BeautifulSoup(html_content, "html.parser")
-    sections = soup.find_all("section", class_="section")
+def scrape_page(page_number):
+    """Fetch one result page, see `fetch_html`."""
+    print(f"Scraping {BASE_URL.format(page_number)}...")
+    return fetch_html(page_number)
+
+def parse_page(html_content):
+    """Parse every job of a single page of HTML content, whatever its date."""
     jobs = []
 
-    for section in sections:
-        spans = section.find_all("span", style="float: right; color: green;")
-        for span in spans:
-            raw_text = span.find_next_sibling(string=True)
-            if raw_text and " - " in raw_text:
-                date, employer = map(str.strip, raw_text.split(" - ", 1))
-            else:
-                date, employer = "Unknown Date", "Unknown Employer"
-
-            try:
-                job_date_obj = datetime.strptime(date, "%Y-%m-%d")
-                date = job_date_obj.strftime("%Y-%m-%d")
-            except ValueError:
-                date = "Unknown Date"
-                job_date_obj = None  # Ensure it doesn't affect date comparison
-
-            # Stop scraping if job date is older than TARGET_DATE
-            if job_date_obj and job_date_obj < target_date_obj:
-                print(f"Reached job date {date}. Stopping scraping.")
-                return None  # This will stop further processing
-
-            title_tag = span.find_next("a")
-            title = title_tag.text.strip() if title_tag else "Unknown Title"
-            job_link = f"https://vakanser.se{title_tag['href']}" if title_tag else "N/A"
-
-            jobs.append({
-                "Date": date,
-                "Title": title,
-                "Employer": employer,
-                "Job Link": job_link
-            })
+    for raw_text, title, href in html_parsing.extract_vakanser(html_content):
+        if raw_text and " - " in raw_text:
+            date, employer = map(str.strip, raw_text.split(" - ", 1))
+        else:
+            date, employer = UNKNOWN_DATE, "Unknown Employer"
+
+        try:
+            date = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            date = UNKNOWN_DATE
+
+        title = title.strip() if title is not None else "Unknown Title"
+        job_link = f"https://vakanser.se{href}" if href is not None else "N/A"
+
+        jobs.append(Job(title, employer, date, job_link))
 
     print(f"Extracted {len(jobs)} jobs from the page.")
     return jobs
 
-def scrape_all_pages(start_page=1, max_empty_pages=3):
-    """Scrape job data from multiple pages, stopping when old job postings are found."""
-    all_jobs = []
-    empty_page_count = 0
-    page_number = start_page
-
-    while empty_page_count < max_empty_pages:
-        page_url = BASE_URL.format(page_number)
-        print(f"Scraping {page_url}...")
-
-        html_content = fetch_html(page_number)
-        if not html_content:
-            empty_page_count += 1
-            page_number += 1
-            continue
-
-        jobs = parse_html(html_content)
-        if jobs is None:  # Stop scraping if we hit an old job
-            break
-        elif not jobs:
-            empty_page_count += 1
-        else:
-            empty_page_count = 0
-            all_jobs.extend(jobs)
-
-        page_number += 1
+@metrics.timed("parse_seconds", source=SOURCE)
+def parse_html(html_content):
+    """Parse job data from a single page of HTML content, or None once a job is older than TARGET_DATE."""
+    jobs = parse_page(html_content)
+    cutoff = target_date_obj.strftime("%Y-%m-%d")
+    for job in jobs:
+        # Stop scraping if job date is older than TARGET_DATE
+        if job["Date"] != UNKNOWN_DATE and job["Date"] < cutoff:
+            print(f"Reached job date {job['Date']}. Stopping scraping.")
+            return None  # This will stop further processing
+    return jobs
 
-    # Remove duplicates based on Title + Employer
-    unique_jobs = pd.DataFrame(all_jobs).drop_duplicates(subset=["Title", "Employer"]).to_dict(orient="records")
-    return unique_jobs
+def newest_date(jobs):
+    """Newest known date of a page's jobs, or None."""
+    return max((job["Date"] for job in jobs if job["Date"] != UNKNOWN_DATE), default=None)
+
+def find_last_page(cutoff, fetch=None, max_pages=MAX_PAGES, failures=None):
+    """
+    Find the last page holding ads published on or after `cutoff` (YYYY-MM-DD), using
+    that the listing is sorted newest first: pages 1, 2, 4, 8... are probed until one is
+    missing or entirely older than the cutoff, then the boundary is binary searched in
+    between. Returns (last page or 0, {page number: HTML of the probed pages}).
+
+    `fetch` follows `fetch_html`: b"" for a missing page, None for a failed fetch. A
+    failed probe is retried PROBE_RETRIES times; if it still fails, the page is taken
+    as past the end and its number is appended to the `failures` list, if given, as
+    the pages behind it may have been missed.
+    """
+    fetch = fetch or scrape_page
+    probed = {}
+
+    def in_range(page_number):
+        if page_number not in probed:
+            for attempt in range(PROBE_RETRIES + 1):
+                probed[page_number] = fetch(page_number)
+                if probed[page_number] is not None:
+                    break
+                print(f"Probe of page {page_number} failed (attempt {attempt + 1}).")
+            else:
+                metrics.inc("failed_pages_total", source=SOURCE)
+                if failures is not None:
+                    failures.append(page_number)
+        if not probed[page_number]:
+            return False
+        jobs = parse_page(probed[page_number])
+        newest = newest_date(jobs)
+        return bool(jobs) and (newest is None or newest >= cutoff)
+
+    if not in_range(1):
+        return 0, probed
+    low, high = 1, 2  # in_range(low) holds; high is the next page to try
+    while high <= max_pages and in_range(high):
+        low, high = high, high * 2
+    high = min(high, max_pages + 1)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if in_range(middle):
+            low = middle
+        else:
+            high = middle
+    print(f"Ads since {cutoff} end on page {low}, found with {len(probed)} probes.")
+    return low, probed
+
+def iter_recent_pages(cutoff=None, should_stop=None, failures=None):
+    """
+    Yield the jobs published on or after `cutoff` (default TARGET_DATE) page by page.
+    The last page is located first (see `find_last_page`), then the whole range is
+    fetched and parsed concurrently; probed pages are not fetched again. Every page
+    of the range exists, so one that cannot be fetched does not end the crawl. The
+    numbers of pages that could not be fetched, probes included, are appended to the
+    `failures` list, if given.
+    """
+    cutoff = cutoff or target_date_obj.strftime("%Y-%m-%d")
+    last_page, probed = find_last_page(cutoff, failures=failures)
+    if not last_page:
+        print(f"No ads since {cutoff}.")
+        return
+
+    def fetch(page_number):
+        return probed.pop(page_number, None) or scrape_page(page_number)
+
+    for jobs in pipeline.crawl_pages(fetch, parse_page, 1, max_empty_pages=None, should_stop=should_stop,
+                                     source=SOURCE, end_page=last_page, failures=failures):
+        yield [job for job in jobs if job["Date"] == UNKNOWN_DATE or job["Date"] >= cutoff]
+
+def only_known(jobs, known_links):
+    """True if every job's key is in `known_links` (job keys already in the job store)."""
+    return all(job_store.job_key(job) in known_links for job in jobs)
+
+def iter_jobs(start_page=1, max_empty_pages=3, known_links=None):
+    """
+    Yield job data page by page, stopping when old job postings are found.
+    If `known_links` (normalized links already in the job store) is given, scraping
+    also stops at the first page that holds only known ads.
+    Pages are fetched and parsed concurrently, see pipeline.crawl_pages.
+    """
+    def should_stop(jobs):
+        return known_links is not None and only_known(jobs, known_links)
+
+    for jobs in pipeline.crawl_pages(scrape_page, parse_html, start_page, max_empty_pages,
+                                     should_stop=should_stop, source=SOURCE):
+        yield from jobs
+
+def scrape_all_pages(start_page=1, max_empty_pages=3, known_links=None):
+    """Scrape job data from multiple pages, removing duplicates based on Title + Employer."""
+    return list(pipeline.dedupe(iter_jobs(start_page, max_empty_pages, known_links)))
 
 def save_to_csv(jobs, filename):
-    """Save jobs to a CSV file."""
-    pd.DataFrame(jobs).to_csv(filename, index=False)
-    print(f"Saved {len(jobs)} jobs to {filename}.")
+    """Save jobs to a CSV file, writing rows as they arrive."""
+    return pipeline.drain(jobs, pipeline.CsvSink(filename, CSV_COLUMNS))
 
 def save_to_html(jobs, filename):
-    """Save jobs to an HTML file."""
-    grouped_jobs = {}
-    for job in jobs:
-        pub_date = job["Date"]
-        if pub_date not in grouped_jobs:
-            grouped_jobs[pub_date] = []
-        grouped_jobs[pub_date].append(job)
-
-    sorted_dates = sorted(grouped_jobs.keys(), reverse=True)
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write("<html><head><title>Job Listings</title>")
-        file.write("<link rel='stylesheet' href='styles.css'></head><body>")
-        file.write("<h1>Job Listings by Date</h1>")
-
-        for date in sorted_dates:
-            file.write(f"<h2>Jobs from {date}</h2>")
-            file.write("<table border='1'><tr><th>Title</th><th>Employer</th><th>Date</th><th>Job Link</th></tr>")
-            for job in grouped_jobs[date]:
-                file.write("<tr>")
-                file.write(f"<td>{job['Title']}</td>")
-                file.write(f"<td>{job['Employer']}</td>")
-                file.write(f"<td>{job['Date']}</td>")
-                file.write(f"<td><a href='{job['Job Link']}' target='_blank'>View Job</a></td>")
-                file.write("</tr>")
-            file.write("</table>")
-        file.write("</body></html>")
-
-    print(f"Saved HTML file to {filename}.")
-
-# --- Main Script ---
-if __name__ == "__main__":
+    """Save jobs to an HTML file, writing rows as they arrive. Jobs must be sorted by date."""
+    return pipeline.drain(jobs, render.SiteSink(filename, HTML_COLUMNS))
+
+def crawl(conn):
+    """
+    Scrape new jobs into the job store, back to TARGET_DATE or, when INCREMENTAL, to
+    the newest date already stored, see connectors.VakanserConnector.
+    Returns the number of new jobs.
+    """
+    import connectors  # Imports this module
+
+    return connectors.crawl(SOURCE, conn)
+
+def publish(conn):
+    """Save the stored jobs to CSV and HTML."""
+    pipeline.drain(
+        job_store.iter_jobs(conn, SOURCE),
+        pipeline.CsvSink(OUTPUT_FILE, CSV_COLUMNS),
+        render.SiteSink(HTML_FILE, HTML_COLUMNS, search_index="data/vakanser/index.json", namespace=SOURCE),
+        search_index.SearchIndexSink(INDEX_DIR),
+    )
+
+def main():
     print("Starting Vakanser Job Scraper...")
 
-    all_jobs = scrape_all_pages(start_page=1, max_empty_pages=3)
-    if all_jobs:
-        save_to_csv(all_jobs, OUTPUT_FILE)
-        save_to_html(all_jobs, HTML_FILE)
+    conn = job_store.connect()
+    new_count = crawl(conn)
+    if new_count or not INCREMENTAL:
+        publish(conn)
     else:
         print("No new jobs found.")
+    conn.close()
 
     print("Vakanser Job Scraper completed successfully.")
+
+# --- Main Script ---
+if __name__ == "__main__":
+    main()
+    metrics.export(run=SOURCE)